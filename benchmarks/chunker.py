@@ -0,0 +1,73 @@
+"""Chunk truncation — share of chunks TEI cuts short, old splitter vs TokenChunker.
+
+    python -m benchmarks.chunker path/to/docs [more paths ...]
+
+Reads the .txt/.md files under the given paths (or the files themselves)
+and chunks them twice: with the TokenTextSplitter the embed worker used to
+run (1024 tiktoken tokens, 128 overlap) and with TokenChunker. Every
+chunk's text is then encoded with BGE's tokenizer, as TEI does, and
+counted as truncated if it's longer than the model's input window. Needs
+llama-index-core (and tiktoken), tokenizers, access to the Hugging Face Hub,
+and modal, which the slackbot package imports.
+"""
+
+import argparse
+from pathlib import Path
+
+from slackbot.index_pipeline.pipeline.embed_worker.embed_worker import CHUNK_OVERLAP, CHUNK_TOKENS, MAX_INPUT_TOKENS
+from slackbot.index_pipeline.pipeline.embed_worker.helpers.chunker import TokenChunker
+from slackbot.index_pipeline.pipeline.embed_worker.tei_server import MODEL
+
+# What EmbedWorker split with before TokenChunker
+OLD_CHUNK_SIZE = 1024
+OLD_CHUNK_OVERLAP = 128
+
+
+def documents(paths: list[str]) -> list:
+    from llama_index.core import Document
+
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.rglob("*")) if path.is_dir() else [path])
+    return [
+        Document(text=f.read_text(errors="replace"), metadata={"source": str(f)})
+        for f in files
+        if f.is_file() and f.suffix in (".txt", ".md")
+    ]
+
+
+def report(label: str, texts: list[str], tokenizer) -> None:
+    """Chunks, share truncated, and share of tokens TEI would drop."""
+    lengths = [len(enc.ids) for enc in tokenizer.encode_batch(texts)]
+    truncated = sum(1 for n in lengths if n > MAX_INPUT_TOKENS)
+    dropped = sum(n - MAX_INPUT_TOKENS for n in lengths if n > MAX_INPUT_TOKENS)
+    print(
+        f"{label:<18} {len(texts):7,} chunks  {truncated / max(len(texts), 1):6.1%} truncated  "
+        f"{dropped / max(sum(lengths), 1):6.1%} of tokens dropped",
+        flush=True,
+    )
+
+
+def main() -> None:
+    from llama_index.core.node_parser import TokenTextSplitter
+    from tokenizers import Tokenizer
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help=".txt/.md files or directories of them")
+    args = parser.parse_args()
+
+    docs = documents(args.paths)
+    # TEI's view of a chunk: the model's tokenizer with [CLS]/[SEP], untruncated
+    tokenizer = Tokenizer.from_pretrained(MODEL)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    print(f"{len(docs):,} documents, {MODEL} window {MAX_INPUT_TOKENS} tokens", flush=True)
+
+    splitter = TokenTextSplitter(chunk_size=OLD_CHUNK_SIZE, chunk_overlap=OLD_CHUNK_OVERLAP)
+    report("TokenTextSplitter", [n.get_content() for n in splitter.get_nodes_from_documents(docs)], tokenizer)
+    chunker = TokenChunker(MODEL, CHUNK_TOKENS, CHUNK_OVERLAP)
+    report("TokenChunker", [c.text for c in chunker.chunks(docs)], tokenizer)
+
+
+if __name__ == "__main__":
+    main()
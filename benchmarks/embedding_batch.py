@@ -0,0 +1,63 @@
+"""Result transport — bytes per chunk and (de)serialization time, tuples vs EmbeddingBatch.
+
+    python -m benchmarks.embedding_batch [--chunks 8192] [--chars 1500]
+
+Builds synthetic embedded chunks (unit-normalized DIM-wide vectors, text of
+--chars characters, the metadata the parser attaches) and pickles them the
+way Modal ships a method result: first as the (id, vector list, text,
+metadata) tuples workers used to return, then as one EmbeddingBatch.
+Needs numpy and modal, which the slackbot package imports.
+"""
+
+import argparse
+import pickle
+import time
+
+from slackbot.index_pipeline.pipeline.embed_worker.tei_server import DIM
+from slackbot.index_pipeline.pipeline.embedding_batch import EmbeddingBatch
+
+
+def chunks(n: int, chars: int) -> tuple[list[str], object, list[str], list[dict]]:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, DIM)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    words = "the quick brown fox jumps over a lazy dog while indexing passages ".split()
+    texts = [" ".join(words[(i + j) % len(words)] for j in range(chars // 5))[:chars] for i in range(n)]
+    ids = [f"{i:032x}" for i in range(n)]
+    metadatas = [{"source": f"doc-{i // 100}.pdf", "fingerprint": f"{i // 100:064x}", "page": i % 100 + 1} for i in range(n)]
+    return ids, vectors, texts, metadatas
+
+
+def measure(label: str, build, n: int, repeat: int) -> None:
+    """Best-of-repeat build+dumps and loads times for one payload shape."""
+    dumps = loads = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blob = pickle.dumps(build(), protocol=pickle.HIGHEST_PROTOCOL)
+        mid = time.perf_counter()
+        pickle.loads(blob)
+        dumps, loads = min(dumps, mid - start), min(loads, time.perf_counter() - mid)
+    print(
+        f"{label:<16} {len(blob) / n / 1024:6.2f} KB/chunk  {len(blob) / 1e6:7.1f} MB  "
+        f"serialize {dumps * 1000:7.1f} ms  deserialize {loads * 1000:7.1f} ms",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=8192, help="one coalesced upsert's worth")
+    parser.add_argument("--chars", type=int, default=1500, help="text length per chunk")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ids, vectors, texts, metadatas = chunks(args.chunks, args.chars)
+    rows = vectors.tolist()
+    measure("tuples", lambda: list(zip(ids, rows, texts, metadatas)), args.chunks, args.repeat)
+    measure("EmbeddingBatch", lambda: EmbeddingBatch.from_columns(ids, vectors, texts, metadatas), args.chunks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Parse throughput — PDF pages/s in one process vs on the ParsePool.
+
+    python -m benchmarks.parse_pool path/to/file.pdf [--copies 4] [--workers 8] [--callers 4]
+
+The PDF is split into PAGES_PER_UNIT page ranges, the same units the index
+pipeline queues, repeated --copies times. Units are parsed one after
+another in this process, then on a ParsePool shared by --callers threads
+(as EmbedWorker's concurrent inputs share it). The parsed-text cache is
+bypassed, so both runs really parse. Needs the embed image's parsing libs
+(pypdf, llama-index-core) and modal, which the slackbot package imports.
+"""
+
+import argparse
+import threading
+import time
+
+from slackbot.index_pipeline.pipeline.embed_worker.helpers.file_parser import FileParser
+from slackbot.index_pipeline.pipeline.embed_worker.helpers.parse_pool import ParsePool
+from slackbot.index_pipeline.pipeline.preprocess.batch_builder import PAGES_PER_UNIT
+
+
+def parse_uncached(work: dict) -> list:
+    """ParsePool entry point without the on-volume cache."""
+    return list(FileParser().parse(work))
+
+
+def units(path: str, copies: int) -> list[dict]:
+    from pypdf import PdfReader
+
+    pages = len(PdfReader(path).pages)
+    return [
+        {"type": "pdf_pages", "path": path, "source": f"copy-{c}.pdf", "fingerprint": f"{c}",
+         "start": start, "end": min(start + PAGES_PER_UNIT, pages)}
+        for c in range(copies)
+        for start in range(0, pages, PAGES_PER_UNIT)
+    ]
+
+
+def serial(work: list[dict]) -> float:
+    start = time.monotonic()
+    for unit in work:
+        parse_uncached(unit)
+    return time.monotonic() - start
+
+
+def pooled(work: list[dict], workers: int, callers: int) -> tuple[float, int]:
+    """Seconds to parse work on one pool from callers threads, and units that failed."""
+    pool = ParsePool(workers)
+    failed = []
+
+    def caller(share: list[dict]) -> None:
+        failed.extend(unit for unit, docs in pool.map(parse_uncached, share) if docs is None)
+
+    # Warm the processes up (spawn + imports) so startup isn't counted
+    list(pool.map(parse_uncached, work[:workers]))
+    threads = [threading.Thread(target=caller, args=(work[i::callers],)) for i in range(callers)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    pool.shutdown()
+    return elapsed, len(failed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf")
+    parser.add_argument("--copies", type=int, default=4, help="times to repeat the PDF's units")
+    parser.add_argument("--workers", type=int, default=8, help="pool processes (EmbedWorker uses PARSE_CPUS)")
+    parser.add_argument("--callers", type=int, default=4, help="threads sharing the pool (WORKERS_PER_GPU)")
+    args = parser.parse_args()
+
+    work = units(args.pdf, args.copies)
+    pages = sum(u["end"] - u["start"] for u in work)
+    print(f"{pages:,} pages in {len(work)} units of up to {PAGES_PER_UNIT} pages", flush=True)
+
+    one = serial(work)
+    print(f"one process: {one:.1f}s, {pages / one:,.1f} pages/s", flush=True)
+    many, failed = pooled(work, args.workers, args.callers)
+    print(
+        f"pool of {args.workers} ({args.callers} callers): {many:.1f}s, {pages / many:,.1f} pages/s, "
+        f"{one / many:.1f}x, {failed} unit(s) failed",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""TEI client throughput — one request at a time vs IN_FLIGHT pipelined.
+
+    python -m benchmarks.tei_client [--batches 64] [--batch-size 256] [--prep-ms 20] [--gpu-ms 40]
+
+Runs against a fake TEI on localhost: each /embed request spends --prep-ms
+on its own (tokenizing, in parallel with other requests) and then --gpu-ms
+holding a single "GPU" lock, and answers with zero vectors of the model's
+dimension. That's the overlap pipelining buys on the real server — the
+next batch is tokenized and on the wire while the GPU runs this one.
+Needs httpx and modal, which the slackbot package imports.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from slackbot.index_pipeline.pipeline.embed_worker.tei_server import DIM, TeiClient, TeiStats
+from slackbot.index_pipeline.pipeline.embed_worker.tei_server.client import IN_FLIGHT
+
+
+def fake_tei(prep: float, gpu: float, dim: int) -> ThreadingHTTPServer:
+    """Start a fake TEI on a free port; its port is server.server_address[1]."""
+    gpu_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["inputs"]
+            time.sleep(prep)
+            with gpu_lock:
+                time.sleep(gpu)
+            body = json.dumps([[0.0] * dim for _ in texts]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(port: int, in_flight: int, batches: list[list[str]]) -> tuple[float, dict]:
+    client = TeiClient(port=port, in_flight=in_flight)
+    stats = TeiStats()
+    start = time.monotonic()
+    for _ in client.embed_all(((i, texts) for i, texts in enumerate(batches)), stats):
+        pass
+    elapsed = time.monotonic() - start
+    client.close()
+    return elapsed, stats.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--prep-ms", type=float, default=20.0, help="per-request time outside the GPU lock")
+    parser.add_argument("--gpu-ms", type=float, default=40.0, help="per-request time holding the GPU lock")
+    parser.add_argument("--in-flight", type=int, default=IN_FLIGHT)
+    args = parser.parse_args()
+
+    server = fake_tei(args.prep_ms / 1000, args.gpu_ms / 1000, DIM)
+    port = server.server_address[1]
+    batches = [[f"passage {b}-{i}" for i in range(args.batch_size)] for b in range(args.batches)]
+    texts = args.batches * args.batch_size
+
+    one, one_stats = run(port, 1, batches)
+    print(f"sequential:   {one:.2f}s, {texts / one:,.0f} texts/s, p50 {one_stats['tei_p50_ms']} ms", flush=True)
+    many, many_stats = run(port, args.in_flight, batches)
+    print(
+        f"{args.in_flight} in flight:  {many:.2f}s, {texts / many:,.0f} texts/s, "
+        f"p50 {many_stats['tei_p50_ms']} ms, {one / many:.1f}x",
+        flush=True,
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,8 @@
 Deploy: modal deploy -m slackbot.app
 """
 
+import json
 import os
-import threading
 
 import modal
 
@@ -14,14 +14,23 @@ slack_secret = modal.Secret.from_name("slack-secret")
 
 slack_bot_image = (
     modal.Image.debian_slim(python_version="3.12")
-    .pip_install("slack-bolt", "fastapi")
+    .pip_install("slack-bolt", "fastapi", "aiohttp", "httpx", "pypdf")
 )
 
+# asyncio router (AsyncApp) by default; set False to fall back to the threaded App path
+ASYNC_ROUTER = True
+
+_QUEUE_FULL = ":no_entry: Too many requests in flight — please try again in a minute."
+
+
+def _busy(position: int) -> str:
+    return f":hourglass: Busy, queued at position {position}."
+
 # These imports register Modal functions/classes on `app` as a side effect.
 from slackbot.index_pipeline import IndexService  # noqa: E402
 from slackbot.ml_agent.service import get_sandbox  # noqa: E402
 from slackbot.rag.service import RagService  # noqa: E402
-from slackbot.router import Router  # noqa: E402
+from slackbot.router import AsyncDispatcher, Dispatcher, EventDedup, QueueFull, Router  # noqa: E402
 
 
 @app.cls(
@@ -38,8 +47,6 @@ class Bot:
         """Captured in the memory snapshot — only runs on first deploy."""
         from fastapi import FastAPI, Request
         from fastapi.responses import Response
-        from slack_bolt import App as SlackApp
-        from slack_bolt.adapter.fastapi import SlackRequestHandler
 
         self.router = Router(
             indexer=IndexService(),
@@ -47,26 +54,29 @@ class Bot:
             ml_sb_fn=get_sandbox,
             vol=rag_vol,
         )
-
-        slack_app = SlackApp(
-            token=os.environ["SLACK_BOT_TOKEN"],
-            signing_secret=os.environ["SLACK_SIGNING_SECRET"],
-        )
-        _register_slack_handlers(slack_app, self.router)
-
-        # Slack retries events if no 200 within 3s — drop retries to avoid duplicate handling
-        handler = SlackRequestHandler(slack_app)
+        self.dedup = EventDedup()
+        if ASYNC_ROUTER:
+            handler, self.dispatcher = _async_slack_handler(self.router)
+        else:
+            handler, self.dispatcher = _sync_slack_handler(self.router)
+
+        # Slack retries events if no 200 within 3s — ack events we've already seen,
+        # but let a retry through if its first delivery never reached us
         self._endpoint = FastAPI()
 
         @self._endpoint.post("/")
         async def root(request: Request):
-            if request.headers.get("x-slack-retry-num"):
+            if self.dedup.is_duplicate(_json_body(await request.body())):
+                print(f"[dedup] dropped duplicate event {self.dedup.stats()}", flush=True)
                 return Response(status_code=200)
             return await handler.handle(request)
 
     @modal.enter(snap=False)
     def restore(self):
         """Runs on every cold start after restoring from snapshot."""
+        # Worker threads start here so they aren't captured in the snapshot
+        if isinstance(self.dispatcher, Dispatcher):
+            self.dispatcher.start()
         print("Bot restored from snapshot", flush=True)
 
     @modal.asgi_app()
@@ -77,19 +87,75 @@ class Bot:
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
 
-def _register_slack_handlers(slack_app, router):
-    """Register Slack event handlers on the bolt app."""
+def _json_body(raw: bytes) -> dict:
+    """Parse an Events API payload; non-JSON bodies (e.g. form posts) yield {}."""
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _sync_slack_handler(router):
+    """Threaded path: bolt App, handlers run on the Dispatcher's worker pool."""
+    from slack_bolt import App as SlackApp
+    from slack_bolt.adapter.fastapi import SlackRequestHandler
+
+    slack_app = SlackApp(
+        token=os.environ["SLACK_BOT_TOKEN"],
+        signing_secret=os.environ["SLACK_SIGNING_SECRET"],
+    )
+    dispatcher = Dispatcher()
 
-    # Dispatch in a thread so Slack gets 200 within its 3s timeout
+    # Hand off to the dispatcher so Slack gets 200 within its 3s timeout
     @slack_app.event("app_mention")
     def handle_mention(body, client, **_):
-        threading.Thread(
-            target=router.handle,
-            args=(body["event"], client),
-            daemon=True,
-        ).start()
+        event = body["event"]
+        thread_ts = event.get("thread_ts", event["ts"])
+        say = lambda text: client.chat_postMessage(channel=event["channel"], text=text, thread_ts=thread_ts)
+        try:
+            position = dispatcher.submit(thread_ts, router.handle, event, client)
+        except QueueFull:
+            say(_QUEUE_FULL)
+            return
+        if position:
+            say(_busy(position))
+        print(f"[dispatch] {dispatcher.stats()}", flush=True)
 
     # Slack sends message events for every channel msg — ignore to avoid 404 noise
     @slack_app.event("message")
     def handle_message(**_):
         pass
+
+    return SlackRequestHandler(slack_app), dispatcher
+
+
+def _async_slack_handler(router):
+    """asyncio path: bolt AsyncApp, handlers run as tasks on the ASGI event loop."""
+    from slack_bolt.adapter.fastapi.async_handler import AsyncSlackRequestHandler
+    from slack_bolt.async_app import AsyncApp
+
+    slack_app = AsyncApp(
+        token=os.environ["SLACK_BOT_TOKEN"],
+        signing_secret=os.environ["SLACK_SIGNING_SECRET"],
+    )
+    dispatcher = AsyncDispatcher()
+
+    @slack_app.event("app_mention")
+    async def handle_mention(body, client, **_):
+        event = body["event"]
+        thread_ts = event.get("thread_ts", event["ts"])
+        try:
+            position = dispatcher.submit(thread_ts, router.ahandle, event, client)
+        except QueueFull:
+            await client.chat_postMessage(channel=event["channel"], text=_QUEUE_FULL, thread_ts=thread_ts)
+            return
+        if position:
+            await client.chat_postMessage(channel=event["channel"], text=_busy(position), thread_ts=thread_ts)
+        print(f"[dispatch] {dispatcher.stats()}", flush=True)
+
+    @slack_app.event("message")
+    async def handle_message(**_):
+        pass
+
+    return AsyncSlackRequestHandler(slack_app), dispatcher
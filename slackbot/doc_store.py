@@ -0,0 +1,105 @@
+"""Content-addressed document store on the rag volume.
+
+Uploaded bytes live once under blobs/, keyed by SHA-256; names/ holds one
+small file per user-facing filename, mapping it to the hash of its current
+content. Re-uploading the same bytes under any name adds a mapping, not a
+blob. One file per name means containers that add different names commit
+different files, so a Bot upload and a reconcile run never overwrite each
+other's mappings (the volume merges them).
+
+This module has NO internal imports, so it can be used from the Bot, the
+index pipeline and the RAG agent alike.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+
+RAG_ROOT = Path("/data/rag")
+
+
+class StoredDoc(NamedTuple):
+    name: str      # user-facing filename
+    sha256: str    # content identity — also the index fingerprint
+    path: Path     # blob path; keeps the name's suffix so readers pick the right parser
+
+
+class DocStore:
+
+    def __init__(self, root: Path = RAG_ROOT):
+        self._blobs = root / "blobs"
+        self._names = root / "names"
+        self._legacy_dir = root / "docs"
+        self.staging = self._blobs / "incoming"
+
+    def add(self, name: str, tmp: Path, sha256: str) -> tuple[StoredDoc, bool]:
+        """Move a fully written file from staging into the store under name.
+
+        Returns (doc, is_new) — is_new is False when the blob already existed,
+        i.e. the same bytes were uploaded before (under any name).
+        """
+        path = self.blob_path(sha256, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self._has_content(sha256)
+        if path.exists():
+            tmp.unlink(missing_ok=True)
+        else:
+            os.replace(tmp, path)
+        self._write(name, sha256)
+        return StoredDoc(name, sha256, path), is_new
+
+    def docs(self) -> list[StoredDoc]:
+        """All mapped documents, sorted by name."""
+        names = self._read()
+        return [StoredDoc(n, h, self.blob_path(h, n)) for n, h in sorted(names.items())]
+
+    def blob_path(self, sha256: str, name: str) -> Path:
+        return self._blobs / sha256[:2] / f"{sha256}{Path(name).suffix.lower()}"
+
+    def adopt_legacy(self) -> int:
+        """Move files saved before the blob store (flat docs/<name>) into it.
+
+        Returns the number of files adopted.
+        """
+        if not self._legacy_dir.exists():
+            return 0
+        adopted = 0
+        for p in sorted(self._legacy_dir.iterdir()):
+            if p.is_file() and not p.name.startswith("."):
+                self.add(p.name, p, _hash_file(p))
+                adopted += 1
+        return adopted
+
+    # -- Internal --
+
+    def _has_content(self, sha256: str) -> bool:
+        # Same bytes under a different suffix still count as known content
+        shard = self._blobs / sha256[:2]
+        return shard.exists() and any(shard.glob(f"{sha256}*"))
+
+    def _read(self) -> dict[str, str]:
+        names: dict[str, str] = {}
+        if self._names.exists():
+            for p in self._names.glob("*.json"):
+                entry = json.loads(p.read_text())
+                names[entry["name"]] = entry["sha256"]
+        return names
+
+    def _write(self, name: str, sha256: str) -> None:
+        """Point name at sha256 — rewrites only this name's file, never the others."""
+        self._names.mkdir(parents=True, exist_ok=True)
+        path = self._names / f"{hashlib.sha256(name.encode()).hexdigest()[:32]}.json"
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp.write_text(json.dumps({"name": name, "sha256": sha256}))
+        os.replace(tmp, path)
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
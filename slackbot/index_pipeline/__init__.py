@@ -1,5 +1,6 @@
 """Parallel indexing pipeline — GPU embedding + CPU upsert."""
 
+from .reconcile import reconcile_index
 from .service import IndexService
 
-__all__ = ["IndexService"]
+__all__ = ["IndexService", "reconcile_index"]
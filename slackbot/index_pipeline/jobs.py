@@ -0,0 +1,132 @@
+"""Background index jobs — debounced, coalesced, one run at a time."""
+
+import sys
+import threading
+import time
+import uuid
+
+from slackbot.doc_store import StoredDoc
+from slackbot.modal_app import index_jobs
+
+# Uploads arriving within this many seconds of each other share one run
+DEBOUNCE_SECONDS = 5.0
+# A run lock older than this is assumed to belong to a crashed container
+LOCK_TTL = 2 * 60 * 60
+LOCK_RETRY_SECONDS = 30.0
+_LOCK_KEY = "__running__"
+
+
+class RunLock:
+    """Cross-container lock on index runs, held in the index-jobs modal.Dict."""
+
+    def __init__(self, store=index_jobs, ttl: float = LOCK_TTL):
+        self._store = store
+        self._ttl = ttl
+
+    def acquire(self, job_id: str) -> bool:
+        """Take the lock for job_id. False if another live run holds it."""
+        if self._store.put(_LOCK_KEY, (job_id, time.time()), skip_if_exists=True):
+            return True
+        holder = self._store.get(_LOCK_KEY)
+        if holder is None or time.time() - holder[1] > self._ttl:
+            print(f"[jobs] breaking stale lock {holder}", flush=True)
+            self._store.pop(_LOCK_KEY, None)
+            return self._store.put(_LOCK_KEY, (job_id, time.time()), skip_if_exists=True)
+        return False
+
+    def release(self, job_id: str) -> None:
+        holder = self._store.get(_LOCK_KEY)
+        if holder is not None and holder[0] == job_id:
+            self._store.pop(_LOCK_KEY, None)
+
+
+class IndexJobs:
+    """Run IndexService in a background thread instead of the caller's.
+
+    submit() returns a job id immediately. Docs submitted while a job is
+    still in its debounce window join that job; docs submitted while a run
+    is in progress start the next job. Runs never overlap — locally there is
+    a single runner thread, and across containers RunLock is held for the
+    duration of each run.
+
+    Listeners are objects with update(text) and finish(text) — LiveMessage
+    fits — and receive the job's stage progress.
+    """
+
+    def __init__(self, indexer, debounce: float = DEBOUNCE_SECONDS, lock: RunLock | None = None):
+        self._indexer = indexer
+        self._debounce = debounce
+        self._lock = lock or RunLock()
+        self._cond = threading.Condition()
+        self._job_id: str | None = None
+        self._docs: dict[str, StoredDoc] = {}
+        self._listeners: list = []
+        self._due = 0.0
+        self._runner: threading.Thread | None = None
+
+    def submit(self, docs: list[StoredDoc], listener) -> str:
+        """Queue docs for indexing; returns the id of the job they joined."""
+        with self._cond:
+            if self._job_id is None:
+                self._job_id = uuid.uuid4().hex[:8]
+            for d in docs:
+                self._docs.setdefault(d.sha256, d)
+            self._listeners.append(listener)
+            self._due = time.monotonic() + self._debounce
+            job_id, queued = self._job_id, len(self._docs)
+            if self._runner is None:
+                self._runner = threading.Thread(target=self._run_forever, name="index-jobs", daemon=True)
+                self._runner.start()
+            self._cond.notify()
+        self._set_status(job_id, "queued", f"{queued} document(s) queued")
+        return job_id
+
+    def status(self, job_id: str) -> dict | None:
+        return index_jobs.get(job_id)
+
+    def _run_forever(self) -> None:
+        while True:
+            job_id, docs, listeners = self._next_job()
+            try:
+                self._run(job_id, docs, listeners)
+            except Exception as e:
+                print(f"[jobs] {job_id} failed: {e}", file=sys.stderr, flush=True)
+                self._set_status(job_id, "failed", str(e))
+                _broadcast(listeners, "finish", f":x: Indexing failed (job {job_id}): {e}")
+
+    def _next_job(self) -> tuple[str, list[StoredDoc], list]:
+        """Wait until a job's debounce window closes, then take it."""
+        with self._cond:
+            while self._job_id is None or time.monotonic() < self._due:
+                self._cond.wait(timeout=None if self._job_id is None else self._due - time.monotonic())
+            job = (self._job_id, list(self._docs.values()), self._listeners)
+            self._job_id, self._docs, self._listeners = None, {}, []
+            return job
+
+    def _run(self, job_id: str, docs: list[StoredDoc], listeners: list) -> None:
+        while not self._lock.acquire(job_id):
+            _broadcast(listeners, "update", f"Waiting for another indexing run to finish (job {job_id})")
+            time.sleep(LOCK_RETRY_SECONDS)
+        try:
+            self._set_status(job_id, "running", "started")
+
+            def progress(text: str) -> None:
+                self._set_status(job_id, "running", text)
+                _broadcast(listeners, "update", f"{text} (job {job_id})")
+
+            result = self._indexer.index(docs, progress=progress)
+        finally:
+            self._lock.release(job_id)
+        self._set_status(job_id, "done", result)
+        _broadcast(listeners, "finish", f"{result} (job {job_id})")
+
+    def _set_status(self, job_id: str, state: str, detail: str) -> None:
+        index_jobs[job_id] = {"state": state, "detail": detail, "updated_at": time.time()}
+
+
+def _broadcast(listeners: list, method: str, text: str) -> None:
+    for listener in listeners:
+        try:
+            getattr(listener, method)(text)
+        except Exception as e:
+            print(f"[jobs] listener error: {e}", file=sys.stderr, flush=True)
@@ -1,15 +1,42 @@
 """GPU embedding worker — TEI sidecar, returns chunks to the pipeline."""
 
+import time
+from typing import Iterable, Iterator
+
 import modal
 
 from slackbot.modal_app import app, rag_vol
 
+from ..embedding_batch import DTYPE, EmbeddingBatch
+from ..work_queue import take
+from .helpers.batcher import LengthBatcher
+from .helpers.chunker import Chunk, TokenChunker
+from .helpers.embedding_cache import EmbeddingCache
 from .helpers.file_parser import FileParser
-from .tei_server import BATCH_SIZE, PORT, TeiServer
+from .helpers.parse_pool import ParsePool
+from .helpers.parsed_cache import ParsedCache
+from .helpers.stream import threaded
+from .tei_server import BATCH_SIZE, DIM, MODEL, TeiClient, TeiServer, TeiStats
 
 WORKERS_PER_GPU = 4
-CHUNK_SIZE = 1024
-CHUNK_OVERLAP = 128
+# Parse processes per container, shared by its WORKERS_PER_GPU inputs
+PARSE_CPUS = 8
+# BGE's input window; TEI truncates anything longer
+MAX_INPUT_TOKENS = 512
+# Chunk windows in BGE tokens: the window minus [CLS] and [SEP], so nothing is truncated
+CHUNK_TOKENS = MAX_INPUT_TOKENS - 2
+CHUNK_OVERLAP = 64
+# Embedding requests hold at most this many padded tokens (count × longest
+# chunk, matching TEI's default --max-batch-tokens) and BATCH_SIZE chunks;
+# chunks are sorted by length within windows of SORT_WINDOW before batching
+TOKEN_BUDGET = 16384
+SORT_WINDOW = 4 * BATCH_SIZE
+# Stage queue depths: parsed documents waiting to be chunked, and TEI-sized
+# groups of chunks waiting to be embedded
+DOC_QUEUE = 64
+NODE_QUEUE = 2
+# Embedded chunks per streamed result group (~2.5 MB of float16 vectors + text)
+GROUP_SIZE = 2048
 
 # TEI base image + parsing/chunking libs
 embed_image = (
@@ -24,6 +51,7 @@ embed_image = (
         "pypdf",
         "python-docx",
         "httpx",
+        "tokenizers",
     )
     .run_commands("python -c \"import nltk; nltk.download('punkt_tab'); nltk.download('stopwords')\"")
 )
@@ -36,6 +64,7 @@ hf_secret = modal.Secret.from_name("hf-secret")
     volumes={"/data": rag_vol},
     secrets=[hf_secret],
     gpu="A10G",
+    cpu=PARSE_CPUS,
     timeout=60 * 60,
     env={
         "HF_HOME": "/data/hf-cache",
@@ -48,43 +77,190 @@ class EmbedWorker:
 
     @modal.enter()
     def _setup(self):
-        import httpx
-        from llama_index.core.node_parser import TokenTextSplitter
-
         self._tei = TeiServer()
         self._tei.start()
-        self._splitter = TokenTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
-        self._parser = FileParser()
-        self._http = httpx.Client(timeout=120.0)
+        self._chunker = TokenChunker(MODEL, CHUNK_TOKENS, CHUNK_OVERLAP)
+        self._pool = ParsePool(PARSE_CPUS)
+        self._parsed = ParsedCache()
+        self._parser = FileParser(self._pool, self._parsed)
+        self._embedded = EmbeddingCache(MODEL, DIM)
+        self._client = TeiClient(callers=WORKERS_PER_GPU)
+
+    @modal.exit()
+    def _teardown(self):
+        self._pool.shutdown()
+        self._client.close()
 
     @modal.method()
-    def embed(self, work: dict, worker_id: int) -> tuple[list, int]:
-        """Parse files, chunk, embed via TEI. Returns (chunks, worker_id)."""
-        docs = self._parser.parse(work)
-        chunks = self._chunk_and_embed(docs)
-        return chunks, worker_id
-
-    def _chunk_and_embed(self, docs: list) -> list:
-        """Split docs into chunks and embed via TEI."""
-        nodes = self._splitter.get_nodes_from_documents(docs)
-        if not nodes:
-            return []
-        texts = [n.get_content() for n in nodes]
-        embeddings = self._embed_texts(texts)
-        return [
-            (n.node_id, emb, text, n.metadata)
-            for n, emb, text in zip(nodes, embeddings, texts)
-        ]
-
-    def _embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """Batch POST to TEI sidecar."""
-        embeddings: list[list[float]] = []
-        for i in range(0, len(texts), BATCH_SIZE):
-            batch = texts[i : i + BATCH_SIZE]
-            resp = self._http.post(
-                f"http://127.0.0.1:{PORT}/embed",
-                json={"inputs": batch},
-            )
-            resp.raise_for_status()
-            embeddings.extend(resp.json())
-        return embeddings
+    def embed_stream(self, batch: dict, worker_id: int) -> Iterator[tuple[str, object]]:
+        """Parse a batch's items, chunk, embed via TEI, streaming the results.
+
+        Yields ("chunks", EmbeddingBatch) groups, then ("done", stats) — see
+        _embed_events(). stats carries worker_id, the number of parsed
+        documents, the batch's predicted vs actual seconds, for progress and
+        cost reporting, and failed: fingerprints of documents with a work
+        unit that didn't parse.
+        """
+        yield from self._embed_events(batch, worker_id)
+
+    @modal.method()
+    def drain_stream(self, queue, worker_id: int) -> Iterator[tuple[str, object]]:
+        """Pull work units from a shared queue until it's empty, streaming the results.
+
+        Same events as embed_stream(); stats also counts the units taken, so
+        a fast worker simply reports more of them.
+        """
+        yield from self._drain_events(queue, worker_id)
+
+    def _embed_events(self, batch: dict, worker_id: int) -> Iterator[tuple[str, object]]:
+        """Yield ("chunks", EmbeddingBatch) every GROUP_SIZE chunks, then ("done", stats).
+
+        Groups leave as soon as they're embedded, so the caller can upsert
+        while this worker keeps going, and the worker holds at most about
+        one group of results at a time.
+        """
+        start = time.monotonic()
+        counts = {"units": 0, "docs": 0, "predicted": 0.0, "failed": []}
+        for group in self._run(batch["items"], counts):
+            yield "chunks", group
+        elapsed = time.monotonic() - start
+        print(
+            f"[embed] worker-{worker_id}: predicted {batch['cost']:.1f}s, actual {elapsed:.1f}s, "
+            f"{counts['cached']}/{counts['chunks']} cached, {counts['truncated']} truncated, TEI {counts['tei']}",
+            flush=True,
+        )
+        yield "done", {"worker_id": worker_id, **counts, "units": 1, "predicted": batch["cost"], "seconds": elapsed}
+
+    def _drain_events(self, queue, worker_id: int) -> Iterator[tuple[str, object]]:
+        """Same events as _embed_events(), for units pulled from queue."""
+        start = time.monotonic()
+        counts = {"units": 0, "docs": 0, "predicted": 0.0, "failed": []}
+        for group in self._run(take(queue), counts):
+            yield "chunks", group
+        elapsed = time.monotonic() - start
+        print(
+            f"[embed] worker-{worker_id}: {counts['units']} units, "
+            f"predicted {counts['predicted']:.1f}s, actual {elapsed:.1f}s, "
+            f"{counts['cached']}/{counts['chunks']} cached, {counts['truncated']} truncated, TEI {counts['tei']}",
+            flush=True,
+        )
+        yield "done", {"worker_id": worker_id, **counts, "seconds": elapsed}
+
+    def _run(self, units: Iterable[dict], counts: dict) -> Iterator[EmbeddingBatch]:
+        """Parse → chunk → embed as overlapping stages, yielding GROUP_SIZE groups.
+
+        Parsing (fanned out to the process pool) and chunking each run on
+        their own thread, DOC_QUEUE and NODE_QUEUE items ahead of the next
+        stage, while this thread keeps the client's IN_FLIGHT length-sorted
+        batches posted to TEI — so the GPU is fed while the next documents
+        are still being read, and only the queues' worth of documents is in
+        memory at once. Chunks already in the embedding cache skip TEI.
+        counts is filled in as units parse, and gets the run's chunk and
+        cache-hit counts and TEI latency/throughput summary at the end.
+        """
+        import numpy as np
+
+        # +2 for the [CLS]/[SEP] TEI adds to every input
+        batcher = LengthBatcher(lambda miss: miss[1].tokens + 2, TOKEN_BUDGET, BATCH_SIZE, SORT_WINDOW)
+        docs = threaded(self._parse_units(units, counts), DOC_QUEUE, name="parse")
+        work = threaded(self._lookups(self._chunker.chunks(docs), batcher), NODE_QUEUE, name="chunk")
+        # Work with no misses has no texts, so embed_all passes it through in order without a request
+        requests = (((hits, batch), [c.text for _, (_, c, _) in batch]) for hits, batch in work)
+        tei = TeiStats()
+        group = _Group()
+        counts.update(chunks=0, cached=0, truncated=0)
+        for (hits, batch), _, embeddings in self._client.embed_all(requests, tei):
+            if batch:
+                matrix = np.asarray(embeddings, dtype=DTYPE)
+                self._embedded.put_many([key for _, (_, _, key) in batch], matrix)
+                group.add([(i, c) for _, (i, c, _) in batch], matrix)
+            if hits:
+                group.add([(i, c) for i, c, _ in hits], np.stack([vec for _, _, vec in hits]))
+                counts["cached"] += len(hits)
+            if len(group) >= GROUP_SIZE:
+                counts["chunks"] += len(group)
+                counts["truncated"] += group.truncated
+                yield group.flush()
+        if len(group):
+            counts["chunks"] += len(group)
+            counts["truncated"] += group.truncated
+            yield group.flush()
+        counts["tei"] = {**tei.summary(), "padding_efficiency": round(batcher.efficiency, 3)}
+        self._parsed.evict()
+
+    def _lookups(self, chunks: Iterable[Chunk], batcher: LengthBatcher) -> Iterator[tuple[list, list]]:
+        """(hits, batch) work for the embed loop, as it's ready.
+
+        batch is a TEI batch of (ordinal, chunk, key) cache misses from
+        batcher; hits are (ordinal, chunk, vector) found in the embedding
+        cache. Hits ride along with the next batch, or go on their own
+        every BATCH_SIZE, so a run of mostly hits (an incremental re-index)
+        streams through the same bounded queues as misses.
+        """
+        hits: list = []
+        for i, chunk in enumerate(chunks):
+            key = self._embedded.key(chunk.text)
+            vector = self._embedded.get_many([key])[0]
+            if vector is None:
+                for batch in batcher.add((i, chunk, key)):
+                    yield hits, batch
+                    hits = []
+            else:
+                hits.append((i, chunk, vector))
+                if len(hits) >= BATCH_SIZE:
+                    yield hits, []
+                    hits = []
+        for batch in batcher.flush():
+            yield hits, batch
+            hits = []
+        if hits:
+            yield hits, []
+
+    def _parse_units(self, units: Iterable[dict], counts: dict) -> Iterator:
+        for unit, docs in self._parser.parse_all(units):
+            counts["units"] += 1
+            counts["predicted"] += unit.get("cost", 0.0)
+            if docs is None:
+                # Part of the document is missing, so it mustn't be marked indexed
+                counts["failed"].append(unit["fingerprint"])
+                continue
+            counts["docs"] += len(docs)
+            yield from docs
+
+
+class _Group:
+    """Embedded chunks accumulating toward one GROUP_SIZE result."""
+
+    def __init__(self):
+        self._reset()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, rows: list[tuple[int, Chunk]], vectors) -> None:
+        import numpy as np
+
+        self._rows.extend(rows)
+        self._vectors.append(np.asarray(vectors, dtype=DTYPE))
+        # Chunks TEI will cut short (+2 for [CLS]/[SEP]) — rare, see TokenChunker
+        self.truncated += sum(1 for _, c in rows if c.tokens + 2 > MAX_INPUT_TOKENS)
+
+    def flush(self) -> EmbeddingBatch:
+        """The group as an EmbeddingBatch in chunk order (batches arrive length-sorted); then reset."""
+        import numpy as np
+
+        order = np.argsort([i for i, _ in self._rows], kind="stable")
+        chunks = [self._rows[i][1] for i in order]
+        batch = EmbeddingBatch.from_columns(
+            [c.node_id for c in chunks],
+            np.concatenate(self._vectors)[order],
+            [c.text for c in chunks],
+            [c.metadata for c in chunks],
+        )
+        self._reset()
+        return batch
+
+    def _reset(self) -> None:
+        self._rows: list[tuple[int, Chunk]] = []
+        self._vectors: list = []
+        self.truncated = 0
@@ -0,0 +1,64 @@
+"""Length-bucketed, token-budgeted batching for embedding requests."""
+
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class LengthBatcher(Generic[T]):
+    """Group items into batches of similar token length.
+
+    Items are buffered window at a time, sorted by length, and cut into
+    batches whose padded size (count × longest member) stays within
+    token_budget and whose count stays within max_batch. Each item comes
+    out with its input ordinal so the caller can restore the original
+    order. efficiency is real tokens / padded tokens over everything
+    batched so far. batches() runs a whole stream; add() and flush() let
+    a caller interleave other work between items.
+    """
+
+    def __init__(self, length: Callable[[T], int], token_budget: int, max_batch: int, window: int):
+        self._length = length
+        self._budget = token_budget
+        self._max_batch = max_batch
+        self._window = window
+        self._tokens = 0
+        self._padded = 0
+        self._buffer: list[tuple[int, int, T]] = []
+        self._count = 0
+
+    @property
+    def efficiency(self) -> float:
+        return self._tokens / self._padded if self._padded else 1.0
+
+    def batches(self, items: Iterable[T]) -> Iterator[list[tuple[int, T]]]:
+        for item in items:
+            yield from self.add(item)
+        yield from self.flush()
+
+    def add(self, item: T) -> list[list[tuple[int, T]]]:
+        """Buffer one item. Returns the window's batches once it's full, else []."""
+        self._buffer.append((self._length(item), self._count, item))
+        self._count += 1
+        return self.flush() if len(self._buffer) >= self._window else []
+
+    def flush(self) -> list[list[tuple[int, T]]]:
+        """Batch whatever is buffered."""
+        buffer, self._buffer = self._buffer, []
+        return list(self._cut(buffer))
+
+    def _cut(self, buffer: list[tuple[int, int, T]]) -> Iterator[list[tuple[int, T]]]:
+        batch: list[tuple[int, int, T]] = []
+        for entry in sorted(buffer, key=lambda e: e[0]):
+            # Sorted ascending, so the newcomer is the batch's longest member
+            if batch and ((len(batch) + 1) * entry[0] > self._budget or len(batch) >= self._max_batch):
+                yield self._emit(batch)
+                batch = []
+            batch.append(entry)
+        if batch:
+            yield self._emit(batch)
+
+    def _emit(self, batch: list[tuple[int, int, T]]) -> list[tuple[int, T]]:
+        self._tokens += sum(n for n, _, _ in batch)
+        self._padded += len(batch) * batch[-1][0]
+        return [(i, item) for _, i, item in batch]
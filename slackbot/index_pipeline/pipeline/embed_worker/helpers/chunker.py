@@ -0,0 +1,94 @@
+"""Token-window chunker using the embedding model's own tokenizer."""
+
+import hashlib
+from typing import Iterable, Iterator, NamedTuple
+
+from .parsed_cache import PARSER_VERSION
+
+# Documents tokenized per encode_batch call (the Rust tokenizer parallelizes across them)
+TOKENIZE_BATCH = 32
+
+
+class Chunk(NamedTuple):
+    node_id: str
+    text: str
+    metadata: dict
+    tokens: int  # model tokens the text encodes to, excluding [CLS]/[SEP]
+
+
+class TokenChunker:
+    """Split Documents into windows of at most max_tokens model tokens.
+
+    Each document is tokenized once; chunks are cut from the original text
+    by the tokens' character offsets. Boundaries are moved back to word
+    starts, so a chunk holds whole words and tokenizes to the tokens it
+    was cut from — it fits the model window and TEI never has to truncate
+    it. (Only a single "word" longer than the window is cut mid-word, and
+    its pieces may encode differently.) Chunk.tokens is counted by encoding
+    the chunk's text again, so it's what the model will actually see.
+    """
+
+    def __init__(self, model: str, max_tokens: int, overlap: int):
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_pretrained(model)
+        self._tokenizer.no_truncation()
+        self._tokenizer.no_padding()
+        self._max = max_tokens
+        self._overlap = overlap
+
+    def chunks(self, docs: Iterable) -> Iterator[Chunk]:
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= TOKENIZE_BATCH:
+                yield from self._split(batch)
+                batch = []
+        yield from self._split(batch)
+
+    def _split(self, docs: list) -> Iterator[Chunk]:
+        if not docs:
+            return
+        encodings = self._tokenizer.encode_batch([d.text for d in docs], add_special_tokens=False)
+        cut = []
+        for doc, enc in zip(docs, encodings):
+            for ordinal, (start, end) in enumerate(self._windows(enc.word_ids, len(enc.offsets))):
+                text = doc.text[enc.offsets[start][0] : enc.offsets[end - 1][1]]
+                if text.strip():
+                    cut.append((doc, ordinal, text))
+        counts = self._tokenizer.encode_batch([text for _, _, text in cut], add_special_tokens=False)
+        for (doc, ordinal, text), enc in zip(cut, counts):
+            yield Chunk(chunk_id(doc.metadata, ordinal, text), text, dict(doc.metadata), len(enc.ids))
+
+    def _windows(self, word_ids: list, n: int) -> Iterator[tuple[int, int]]:
+        """Token ranges [start, end) of at most max_tokens, overlapping by about overlap."""
+        start = 0
+        while start < n:
+            end = min(start + self._max, n)
+            if end < n:
+                end = _word_start(word_ids, end, floor=start + 1)
+            yield start, end
+            if end >= n:
+                return
+            start = max(_word_start(word_ids, end - self._overlap, floor=start + 1), start + 1)
+
+
+def chunk_id(metadata: dict, ordinal: int, text: str) -> str:
+    """Stable id from where a chunk came from and what it says.
+
+    (source, parser version, locator within the source, ordinal, text hash)
+    — re-running the same content yields the same ids, so upserts
+    overwrite instead of duplicating, and a passage unchanged between two
+    versions of a file keeps its id.
+    """
+    locator = metadata.get("page") or metadata.get("page_label") or metadata.get("filename") or ""
+    text_hash = hashlib.sha256(text.encode()).hexdigest()
+    key = f"{metadata.get('source', '')}\0{PARSER_VERSION}\0{locator}\0{ordinal}\0{text_hash}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _word_start(word_ids: list, i: int, floor: int) -> int:
+    """Largest token index ≤ i that begins a word, but not below floor."""
+    while i > floor and word_ids[i] is not None and word_ids[i] == word_ids[i - 1]:
+        i -= 1
+    return i
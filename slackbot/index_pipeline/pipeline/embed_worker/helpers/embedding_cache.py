@@ -0,0 +1,135 @@
+"""Chunk embedding cache — vectors keyed by model and normalized chunk text."""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+CACHE_DIR = Path("/data/rag/embed-cache")
+DIGEST_BYTES = 16
+_SPACE = re.compile(r"\s+")
+
+
+class EmbeddingCache:
+    """Append-only float16 vector shards with a digest index.
+
+    Each container writes its own shard (<shard>.f16 rows + <shard>.idx
+    digests, row i ↔ digest i), so there is never more than one writer per
+    file. On start every shard's index is read into memory and its vectors
+    are memory-mapped, so lookups touch only the rows they need — this
+    container's own shard included, remapped as it grows, so vectors it
+    writes are readable without being held in memory. Entries written by
+    other containers after that are picked up next start. A failed append
+    is rolled back in both files, so rows and digests never fall out of
+    step; if even that fails, this container stops writing its shard.
+
+    Keys hash the model id with the chunk text, whitespace-normalized, so a
+    model change never reuses old vectors and a re-extracted page with the
+    same words hits.
+    """
+
+    def __init__(self, model: str, dim: int, root: Path = CACHE_DIR, shard: str | None = None):
+        import numpy as np
+
+        self._np = np
+        self._model = model
+        self._dim = dim
+        self._dir = root / f"{re.sub(r'[^A-Za-z0-9.-]+', '_', model)}-{dim}"
+        self._shard = shard or os.environ.get("MODAL_TASK_ID") or uuid.uuid4().hex[:12]
+        if self._path(".f16").exists() or self._path(".idx").exists():
+            # Never append to a shard an earlier run left behind — its files may not line up
+            self._shard = f"{self._shard}-{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        self._index: dict[bytes, tuple[int, int]] = {}  # digest -> (mapped shard, row)
+        self._mapped: list = []
+        self._load()
+        # This container's shard: its slot in _mapped (remapped as it grows) and row count
+        self._own = len(self._mapped)
+        self._own_rows = 0
+        self._mapped.append(None)
+        self._writable = True
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def key(self, text: str) -> bytes:
+        normalized = _SPACE.sub(" ", text).strip()
+        return hashlib.sha256(f"{self._model}\0{normalized}".encode()).digest()[:DIGEST_BYTES]
+
+    def get_many(self, keys: list[bytes]) -> list:
+        """float16 vector per key, or None for a miss."""
+        found = []
+        with self._lock:
+            for k in keys:
+                if k not in self._index:
+                    found.append(None)
+                    continue
+                shard, row = self._index[k]
+                if shard == self._own and (self._mapped[shard] is None or row >= len(self._mapped[shard])):
+                    self._mapped[shard] = self._np.memmap(
+                        self._path(".f16"), dtype="float16", mode="r", shape=(self._own_rows, self._dim),
+                    )
+                found.append(self._mapped[shard][row])
+        return found
+
+    def put_many(self, keys: list[bytes], vectors) -> None:
+        matrix = self._np.asarray(vectors, dtype="float16").reshape(len(keys), self._dim)
+        with self._lock:
+            new = list({k: i for i, k in enumerate(keys) if k not in self._index}.values())
+            if not new or not self._writable:
+                return
+            try:
+                self._append(matrix[new].tobytes(), b"".join(keys[i] for i in new))
+            except OSError as e:
+                print(f"[embed-cache] write to shard {self._shard} failed, not cached: {e}", file=sys.stderr, flush=True)
+                return
+            for row, i in enumerate(new, start=self._own_rows):
+                self._index[keys[i]] = (self._own, row)
+            self._own_rows += len(new)
+
+    def _append(self, vectors: bytes, digests: bytes) -> None:
+        """Append rows to both shard files, or to neither."""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._path(".f16").open("ab") as vec, self._path(".idx").open("ab") as idx:
+            sizes = os.fstat(vec.fileno()).st_size, os.fstat(idx.fileno()).st_size
+            try:
+                # Vectors before digests: a crash in between leaves rows with no key, never a key with no row
+                vec.write(vectors)
+                vec.flush()
+                idx.write(digests)
+                idx.flush()
+            except OSError:
+                try:
+                    vec.truncate(sizes[0])
+                    idx.truncate(sizes[1])
+                except OSError:
+                    # Rows and digests may now be out of step — append nothing more
+                    self._writable = False
+                raise
+
+    def _path(self, suffix: str) -> Path:
+        return self._dir / f"{self._shard}{suffix}"
+
+    def _load(self) -> None:
+        if not self._dir.exists():
+            return
+        row_bytes = self._dim * 2
+        for idx in sorted(self._dir.glob("*.idx")):
+            vec = idx.with_suffix(".f16")
+            try:
+                digests = idx.read_bytes()
+                rows = min(len(digests) // DIGEST_BYTES, vec.stat().st_size // row_bytes)
+                if rows == 0:
+                    continue
+                mapped = self._np.memmap(vec, dtype="float16", mode="r", shape=(rows, self._dim))
+            except (OSError, ValueError) as e:
+                print(f"[embed-cache] skipping shard {idx.stem}: {e}", file=sys.stderr, flush=True)
+                continue
+            shard = len(self._mapped)
+            self._mapped.append(mapped)
+            for row in range(rows):
+                self._index[digests[row * DIGEST_BYTES : (row + 1) * DIGEST_BYTES]] = (shard, row)
+        print(f"[embed-cache] {len(self._index):,} vectors in {len(self._mapped)} shard(s)", flush=True)
@@ -2,63 +2,112 @@
 
 import io
 import zipfile
-from pathlib import Path
+from typing import Iterable, Iterator
+
+from .parse_pool import ParsePool
+from .parsed_cache import ParsedCache
 
 
 class FileParser:
 
-    def parse(self, work: dict) -> list:
-        """Parse a work unit into Documents ready for embedding."""
-        if work["type"] == "files":
-            return self._parse_files(work["paths"])
+    def __init__(self, pool: ParsePool | None = None, cache: ParsedCache | None = None):
+        self._pool = pool
+        self._cache = cache
+
+    def parse_all(self, works: Iterable[dict]) -> Iterator[tuple[dict, list | None]]:
+        """(work, Documents) for each work item, in order.
+
+        With a pool, items are parsed on its worker processes, several at
+        once; an item that times out or fails yields None, so the caller
+        can tell it from one with no text. Without, each is parsed here.
+        """
+        if self._pool is None:
+            for work in works:
+                yield work, list(self.parse(work))
+            return
+        yield from self._pool.map(parse_work, works)
+
+    def parse(self, work: dict) -> Iterator:
+        """Parse a work item into Documents ready for embedding.
+
+        Documents are yielded as they're read — a page or zip entry at a
+        time where the format allows — so a large item never has to be held
+        in memory whole. With a cache, a unit parsed before (same bytes, same
+        PARSER_VERSION) is read back instead, and a fresh parse is stored.
+        """
+        if self._cache is None:
+            return self._read(work)
+        cached = self._cache.get(work)
+        if cached is not None:
+            return iter(cached)
+        return self._cache.through(work, self._read(work))
+
+    def _read(self, work: dict) -> Iterator:
+        if work["type"] == "file":
+            return self._parse_file(work)
+        elif work["type"] == "pdf_pages":
+            return self._parse_pdf_pages(work)
         elif work["type"] == "zip_entries":
-            return self._parse_zip(work["zip_path"], work["entries"])
+            return self._parse_zip(work)
         raise ValueError(f"Unknown work type: {work['type']}")
 
-    def _parse_files(self, paths: list[str]) -> list:
-        """Parse loose files (PDF, DOCX, plaintext) via SimpleDirectoryReader.
+    def _parse_file(self, work: dict) -> Iterator:
+        """Parse a loose file (PDF, DOCX, plaintext) via SimpleDirectoryReader.
 
-        Each doc gets source (filename) and fingerprint (mtime:size) metadata
-        so Scanner can detect changes on subsequent runs.
+        Documents get source (the user-facing filename) and fingerprint
+        (content SHA-256) metadata so Scanner can tell which content is
+        already indexed.
         """
         from llama_index.core import SimpleDirectoryReader
 
-        docs = []
-        for path in paths:
-            p = Path(path)
-            fingerprint = _fingerprint(p)
-            for doc in SimpleDirectoryReader(input_files=[path]).load_data():
-                doc.metadata["source"] = p.name
-                doc.metadata["fingerprint"] = fingerprint
-                docs.append(doc)
-        return docs
-
-    def _parse_zip(self, zip_path: str, entries: list[str]) -> list:
+        for doc in SimpleDirectoryReader(input_files=[work["path"]]).load_data():
+            doc.metadata["source"] = work["source"]
+            doc.metadata["fingerprint"] = work["fingerprint"]
+            yield doc
+
+    def _parse_pdf_pages(self, work: dict) -> Iterator:
+        """Parse pages [start, end) of a PDF, one Document per page.
+
+        Pages carry a 1-based page number so chunks from different ranges
+        of the same file can be cited and put back in order.
+        """
+        from llama_index.core import Document
+        from pypdf import PdfReader
+
+        reader = PdfReader(work["path"])
+        for i in range(work["start"], min(work["end"], len(reader.pages))):
+            text = reader.pages[i].extract_text() or ""
+            if text.strip():
+                yield Document(
+                    text=text,
+                    metadata={"source": work["source"], "fingerprint": work["fingerprint"], "page": i + 1},
+                )
+
+    def _parse_zip(self, work: dict) -> Iterator:
         """Read assigned zip entries into Documents.
 
         Each entry is extracted as text (PDF pages joined, plaintext decoded).
-        All entries share the zip file's source name and fingerprint.
+        All entries share the zip's source name and fingerprint.
         """
         from llama_index.core import Document
 
-        p = Path(zip_path)
-        fingerprint = _fingerprint(p)
-        docs = []
-        with zipfile.ZipFile(zip_path) as zf:
-            for name in entries:
+        with zipfile.ZipFile(work["zip_path"]) as zf:
+            for name in work["entries"]:
                 text = _read_zip_entry(zf, name)
                 if text and text.strip():
-                    docs.append(Document(
+                    yield Document(
                         text=text,
-                        metadata={"source": p.name, "filename": name, "fingerprint": fingerprint},
-                    ))
-        return docs
+                        metadata={"source": work["source"], "filename": name, "fingerprint": work["fingerprint"]},
+                    )
+
 
+def parse_work(work: dict) -> list:
+    """Parse one work item to a list of Documents — the ParsePool entry point.
 
-def _fingerprint(path: Path) -> str:
-    """mtime_ns:size — stored in ChromaDB metadata for incremental indexing."""
-    stat = path.stat()
-    return f"{stat.st_mtime_ns}:{stat.st_size}"
+    Runs in a pool process, so the parsed-text cache is read and written
+    there too, and a hit costs no parsing at all.
+    """
+    return list(FileParser(cache=ParsedCache()).parse(work))
 
 
 def _read_zip_entry(zf: zipfile.ZipFile, name: str) -> str | None:
@@ -0,0 +1,171 @@
+"""Process pool for GIL-bound parsing (pypdf, python-docx), with per-item timeouts."""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator
+
+# A work unit is at most ~PAGES_PER_UNIT pages; anything slower is pathological
+PARSE_TIMEOUT = 120.0
+# How often a waiting caller checks whether its item has started (and when)
+POLL_SECONDS = 1.0
+
+# Set in each pool process by _init_process: where calls report their start
+_started = None
+
+
+class ParsePool:
+    """Run a parse function over work items on worker processes.
+
+    map() keeps about one item per process in flight and yields results in
+    input order. The timeout counts from when an item starts running in a
+    process, not from when it was queued — the pool is shared by every
+    concurrent input in the container, so an item may wait a while for a
+    free process. An item that exceeds it is given up on and the pool is
+    rebuilt, since a stuck process can't be interrupted; items that were
+    running alongside it on the old pool are retried once on the new one,
+    and items still queued there are resubmitted.
+    """
+
+    def __init__(self, workers: int | None = None, timeout: float = PARSE_TIMEOUT):
+        self._workers = workers or os.cpu_count() or 1
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._context = multiprocessing.get_context("spawn")
+        self._waiting: set[int] = set()  # call ids whose caller hasn't had a result yet
+        self._starts: dict[int, float] = {}  # call id -> time it began running
+        self._retired: set[ProcessPoolExecutor] = set()
+        self._pool = self._new_pool()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def map(self, fn: Callable[[dict], list], items: Iterable[dict]) -> Iterator[tuple[dict, list | None]]:
+        """Yield (item, fn(item)) in order; a timed-out or failed item yields None."""
+        window: list[tuple] = []
+        for item in items:
+            window.append(self._submit(fn, item))
+            if len(window) >= self._workers:
+                yield self._result(fn, *window.pop(0))
+        while window:
+            yield self._result(fn, *window.pop(0))
+
+    def shutdown(self) -> None:
+        self._retired.add(self._pool)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, item: dict) -> tuple[dict, int, ProcessPoolExecutor, Future]:
+        call_id = next(self._ids)
+        with self._lock:
+            pool = self._pool
+            self._waiting.add(call_id)
+        return item, call_id, pool, pool.submit(_call, fn, call_id, item)
+
+    def _result(
+        self, fn, item: dict, call_id: int, pool: ProcessPoolExecutor, future: Future, retry: bool = True,
+    ) -> tuple[dict, list | None]:
+        try:
+            return item, self._wait(call_id, future)
+        except FutureTimeout:
+            print(f"[parse] {_label(item)}: timed out after {self._timeout:.0f}s", file=sys.stderr, flush=True)
+            self._rebuild(pool)
+        except CancelledError:
+            # Still queued on a pool another caller rebuilt — it never ran
+            return self._result(fn, *self._submit(fn, item), retry=retry)
+        except BrokenProcessPool:
+            # Killed by a rebuild (or a crash) while running — try once more
+            if retry:
+                return self._result(fn, *self._submit(fn, item), retry=False)
+            print(f"[parse] {_label(item)}: worker process died", file=sys.stderr, flush=True)
+        except Exception as e:
+            print(f"[parse] {_label(item)}: {e}", file=sys.stderr, flush=True)
+        finally:
+            with self._lock:
+                self._waiting.discard(call_id)
+                self._starts.pop(call_id, None)
+        return item, None
+
+    def _wait(self, call_id: int, future: Future) -> list:
+        """future.result(), raising FutureTimeout once the call has run for timeout seconds."""
+        handed_over = None
+        while True:
+            started = self._starts.get(call_id)
+            if started is None and future.running():
+                # Handed to the processes but no start report yet. A process
+                # stuck without releasing the GIL can't send one, so give up
+                # a timeout after that anyway (the extra timeout covers the
+                # wait behind the call already running there).
+                handed_over = handed_over or time.time()
+                started = handed_over + self._timeout
+            left = None if started is None else started + self._timeout - time.time()
+            try:
+                # A call may have finished while its caller was busy with earlier
+                # results, so look before declaring it overdue
+                return future.result(timeout=POLL_SECONDS if left is None else max(0.0, left))
+            except FutureTimeout:
+                if left is not None and left <= 0:
+                    raise
+
+    def _record_starts(self, pool: ProcessPoolExecutor, started_queue) -> None:
+        """Collect start reports from one pool's processes until it's retired."""
+        while True:
+            try:
+                call_id, started = started_queue.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if pool in self._retired:
+                    self._retired.discard(pool)
+                    return
+                continue
+            with self._lock:
+                if call_id in self._waiting:
+                    self._starts[call_id] = started
+
+    def _rebuild(self, stuck: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is not stuck:
+                return  # another thread already replaced it
+            self._pool = self._new_pool()
+            self._retired.add(stuck)
+        # ProcessPoolExecutor can't cancel a running call; kill its processes
+        for proc in list((stuck._processes or {}).values()):
+            proc.kill()
+        stuck.shutdown(wait=False, cancel_futures=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Each pool reports starts on its own queue, so processes killed in a
+        # rebuild can't leave a half-written message for the next pool's
+        started_queue = self._context.Queue()
+        # spawn, not fork — the container already runs threads (HTTP client, stages)
+        pool = ProcessPoolExecutor(
+            self._workers, mp_context=self._context, initializer=_init_process, initargs=(started_queue,),
+        )
+        threading.Thread(
+            target=self._record_starts, args=(pool, started_queue), name="parse-starts", daemon=True,
+        ).start()
+        return pool
+
+
+def _init_process(started_queue) -> None:
+    global _started
+    _started = started_queue
+
+
+def _call(fn: Callable[[dict], list], call_id: int, item: dict) -> list:
+    """Pool-side wrapper: report the start, then run fn."""
+    _started.put((call_id, time.time()))
+    return fn(item)
+
+
+def _label(item: dict) -> str:
+    if item.get("type") == "pdf_pages":
+        return f"{item['source']} pages {item['start'] + 1}-{item['end']}"
+    return item.get("source", "?")
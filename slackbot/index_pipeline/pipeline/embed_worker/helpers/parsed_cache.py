@@ -0,0 +1,119 @@
+"""On-volume cache of parsed Documents, keyed by content hash and parser version."""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator
+
+PARSED_DIR = Path("/data/rag/parsed")
+# Bump when parsing output changes so old entries stop matching
+PARSER_VERSION = 1
+MAX_BYTES = 10 * 1024**3
+# Eviction trims down to this fraction of MAX_BYTES, so it doesn't run on every write
+LOW_WATER = 0.9
+EVICT_INTERVAL = 60.0
+
+
+class ParsedCache:
+    """Extracted text and metadata per work unit, zlib-compressed JSON.
+
+    A work unit's key is its document's SHA-256, its locator (whole file,
+    page range, or set of zip entries) and PARSER_VERSION, so re-chunking
+    or re-embedding the same bytes skips parsing entirely. Reads touch the
+    entry's mtime and evict() drops least-recently-used entries once the
+    cache is over MAX_BYTES.
+    """
+
+    def __init__(self, root: Path = PARSED_DIR, max_bytes: int = MAX_BYTES):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._last_evict = 0.0
+
+    def get(self, work: dict) -> list | None:
+        """The unit's Documents, or None on a miss."""
+        path = self._path(work)
+        try:
+            records = json.loads(zlib.decompress(path.read_bytes()))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[parsed-cache] unreadable {path.name}: {e}", file=sys.stderr, flush=True)
+            return None
+        return [_to_document(r) for r in records]
+
+    def through(self, work: dict, docs: Iterable) -> Iterator:
+        """Yield docs, then store them if the whole unit was parsed."""
+        seen = []
+        for doc in docs:
+            seen.append(doc)
+            yield doc
+        self.put(work, seen)
+
+    def put(self, work: dict, docs: list) -> None:
+        path = self._path(work)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(json.dumps([_to_record(d) for d in docs]).encode(), 6)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def evict(self) -> int:
+        """Delete least-recently-used entries while over MAX_BYTES. Returns bytes freed.
+
+        Rate-limited to once per EVICT_INTERVAL, since it walks the cache.
+        """
+        if time.monotonic() - self._last_evict < EVICT_INTERVAL or not self._root.exists():
+            return 0
+        self._last_evict = time.monotonic()
+        entries = []
+        for p in self._root.glob("*/*.json.z"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue  # evicted by another container
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        if total <= self._max_bytes:
+            return 0
+        freed, target = 0, total - int(self._max_bytes * LOW_WATER)
+        for _, size, p in sorted(entries):
+            if freed >= target:
+                break
+            p.unlink(missing_ok=True)
+            freed += size
+        print(f"[parsed-cache] evicted {freed / 1e6:.0f} MB ({total / 1e6:.0f} MB cached)", flush=True)
+        return freed
+
+    def _path(self, work: dict) -> Path:
+        fp = work["fingerprint"]
+        key = hashlib.sha256(f"{PARSER_VERSION}:{fp}:{_locator(work)}".encode()).hexdigest()[:32]
+        return self._root / fp[:2] / f"{fp}-{key}.json.z"
+
+
+def _locator(work: dict) -> str:
+    if work["type"] == "pdf_pages":
+        return f"pages:{work['start']}-{work['end']}"
+    if work["type"] == "zip_entries":
+        return "entries:" + hashlib.sha256("\0".join(sorted(work["entries"])).encode()).hexdigest()
+    return work["type"]
+
+
+def _to_record(doc) -> dict:
+    return {
+        "text": doc.text,
+        "metadata": doc.metadata,
+        "excluded_embed_metadata_keys": doc.excluded_embed_metadata_keys,
+        "excluded_llm_metadata_keys": doc.excluded_llm_metadata_keys,
+    }
+
+
+def _to_document(record: dict):
+    from llama_index.core import Document
+
+    return Document(**record)
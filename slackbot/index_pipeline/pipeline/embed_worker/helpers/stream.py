@@ -0,0 +1,56 @@
+"""Bounded background stages for the parse → chunk → embed pipeline."""
+
+import queue
+import threading
+from typing import Iterable, Iterator
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def threaded(items: Iterable, maxsize: int, name: str = "stage") -> Iterator:
+    """Iterate items on a background thread, at most maxsize ahead of the consumer.
+
+    The producer blocks when the queue is full, so memory is bounded by
+    maxsize rather than by how much the source could produce. Exceptions
+    in the producer are re-raised in the consumer. If the consumer stops
+    early, the producer is told to stop at its next put.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
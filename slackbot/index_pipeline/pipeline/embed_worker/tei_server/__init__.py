@@ -1,5 +1,6 @@
 """TEI embedding server subprocess."""
 
-from .server import BATCH_SIZE, MODEL, PORT, TeiServer
+from .client import TeiClient, TeiStats
+from .server import BATCH_SIZE, DIM, MODEL, PORT, TeiServer
 
-__all__ = ["BATCH_SIZE", "MODEL", "PORT", "TeiServer"]
+__all__ = ["BATCH_SIZE", "DIM", "MODEL", "PORT", "TeiClient", "TeiServer", "TeiStats"]
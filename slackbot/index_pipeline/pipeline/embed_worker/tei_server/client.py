@@ -0,0 +1,120 @@
+"""TEI HTTP client — several batches in flight, results in order."""
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, TypeVar
+
+from .server import PORT
+
+IN_FLIGHT = 4
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+# TEI answers these while its queue is full or the model is still loading
+_RETRY_STATUSES = {429, 503}
+
+T = TypeVar("T")
+
+
+class TeiStats:
+    """Per-batch latency and token throughput for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: list[float] = []
+        self.texts = 0
+        self.tokens = 0
+        self.retries = 0
+        self._start = time.monotonic()
+
+    def record(self, seconds: float, texts: int, tokens: int, retries: int) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self.texts += texts
+            self.tokens += tokens
+            self.retries += retries
+
+    def summary(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+        elapsed = time.monotonic() - self._start
+        return {
+            "batches": len(lat),
+            "tei_p50_ms": round(_pct(lat, 0.50) * 1000),
+            "tei_p95_ms": round(_pct(lat, 0.95) * 1000),
+            "tokens_per_s": round(self.tokens / elapsed) if elapsed else 0,
+            "retries": self.retries,
+        }
+
+
+class TeiClient:
+    """Post embedding batches to the TEI sidecar with up to in_flight per caller.
+
+    TEI batches concurrent requests itself and tokenizes the next while the
+    GPU runs the current one, so keeping several in flight keeps it busy.
+    One client (connection pool + threads) is shared by every input in the
+    container; each embed_all() call keeps its own window of in_flight.
+    """
+
+    def __init__(self, port: int = PORT, in_flight: int = IN_FLIGHT, callers: int = 1):
+        import httpx
+
+        self._url = f"http://127.0.0.1:{port}/embed"
+        self._in_flight = in_flight
+        self._http = httpx.Client(
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=in_flight * callers),
+        )
+        self._pool = ThreadPoolExecutor(in_flight * callers, thread_name_prefix="tei")
+
+    def embed_all(
+        self,
+        groups: Iterable[tuple[T, list[str]]],
+        stats: TeiStats | None = None,
+    ) -> Iterator[tuple[T, list[str], list[list[float]]]]:
+        """Embed (tag, texts) groups; yields (tag, texts, embeddings) in input order.
+
+        A group with no texts is passed through without a request.
+        """
+        window = []
+        for tag, texts in groups:
+            window.append((tag, texts, self._pool.submit(self._post, texts, stats) if texts else _empty()))
+            if len(window) >= self._in_flight:
+                tag, texts, future = window.pop(0)
+                yield tag, texts, future.result()
+        for tag, texts, future in window:
+            yield tag, texts, future.result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
+
+    def _post(self, texts: list[str], stats: TeiStats | None) -> list[list[float]]:
+        start = time.monotonic()
+        for attempt in range(MAX_RETRIES + 1):
+            resp = self._http.post(self._url, json={"inputs": texts})
+            if resp.status_code not in _RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            delay = BACKOFF_SECONDS * 2**attempt * (0.5 + random.random())
+            print(f"[tei] {resp.status_code}, retrying in {delay:.1f}s", file=sys.stderr, flush=True)
+            time.sleep(delay)
+        resp.raise_for_status()
+        if stats is not None:
+            # TEI reports the batch's token count; fall back to a rough estimate
+            tokens = int(resp.headers.get("x-compute-tokens", 0)) or sum(len(t) // 4 for t in texts)
+            stats.record(time.monotonic() - start, len(texts), tokens, attempt)
+        return resp.json()
+
+
+def _empty() -> Future:
+    future: Future = Future()
+    future.set_result([])
+    return future
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
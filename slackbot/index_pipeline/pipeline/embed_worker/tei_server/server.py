@@ -5,6 +5,7 @@ import subprocess
 import time
 
 MODEL = "BAAI/bge-base-en-v1.5"
+DIM = 768
 PORT = 8000
 MAX_BATCH = 512
 BATCH_SIZE = 256
@@ -0,0 +1,152 @@
+"""EmbeddingBatch — columnar transport for embedded chunks between workers."""
+
+import json
+from array import array
+
+# BGE vectors are unit-normalized, so half precision costs nothing measurable
+# in cosine ranking and halves the payload again
+DTYPE = "float16"
+
+
+class EmbeddingBatch:
+    """Embedded chunks as columns instead of one tuple per chunk.
+
+    Vectors are a single contiguous matrix, texts a single UTF-8 blob with
+    offsets, and metadata one JSON object per row ("{...},") with its own
+    offsets. A pickled batch is a handful of bytes objects — no per-float
+    boxing — and unpickling doesn't need numpy, so it can pass through
+    containers that only count it (len()). Columns are decoded lazily on
+    access; embeddings is a zero-copy view, and slice() and concat() cut
+    and join the raw columns without decoding them.
+    """
+
+    def __init__(
+        self, ids: list[str], vectors: bytes, dim: int, texts: bytes, offsets: bytes,
+        metadatas: bytes, metadata_offsets: bytes,
+    ):
+        self.ids = ids
+        self._vectors = vectors
+        self.dim = dim
+        self._texts = texts
+        self._offsets = offsets
+        self._metadatas = metadatas
+        self._metadata_offsets = metadata_offsets
+
+    @classmethod
+    def from_columns(cls, ids: list[str], embeddings, texts: list[str], metadatas: list[dict]) -> "EmbeddingBatch":
+        """Build from parallel columns; embeddings is anything numpy can stack."""
+        import numpy as np
+
+        matrix = np.asarray(embeddings, dtype=DTYPE)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(ids), -1)
+        texts_blob, offsets = _pack([t.encode() for t in texts])
+        metadatas_blob, metadata_offsets = _pack([json.dumps(m).encode() + b"," for m in metadatas])
+        return cls(list(ids), matrix.tobytes(), matrix.shape[1], texts_blob, offsets, metadatas_blob, metadata_offsets)
+
+    @classmethod
+    def concat(cls, batches: list["EmbeddingBatch"]) -> "EmbeddingBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        return cls(
+            [i for b in batches for i in b.ids],
+            b"".join(b._vectors for b in batches),
+            batches[0].dim,
+            b"".join(b._texts for b in batches),
+            _join_offsets([b._offsets for b in batches]),
+            b"".join(b._metadatas for b in batches),
+            _join_offsets([b._metadata_offsets for b in batches]),
+        )
+
+    @classmethod
+    def empty(cls) -> "EmbeddingBatch":
+        none = array("Q", [0]).tobytes()
+        return cls([], b"", 0, b"", none, b"", none)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self._vectors) + len(self._texts) + len(self._offsets)
+            + len(self._metadatas) + len(self._metadata_offsets)
+        )
+
+    @property
+    def embeddings(self):
+        """(n, dim) matrix, a read-only view on the transported bytes."""
+        import numpy as np
+
+        return np.frombuffer(self._vectors, dtype=DTYPE).reshape(len(self.ids), self.dim)
+
+    @property
+    def texts(self) -> list[str]:
+        offsets = _unpack(self._offsets)
+        blob = memoryview(self._texts)
+        return [bytes(blob[offsets[i] : offsets[i + 1]]).decode() for i in range(len(self.ids))]
+
+    @property
+    def metadatas(self) -> list[dict]:
+        # Rows end in "," — one parse for the whole column
+        return json.loads(b"[" + self._metadatas[:-1] + b"]") if self._metadatas else []
+
+    def slice(self, start: int, stop: int) -> "EmbeddingBatch":
+        stop = min(stop, len(self))
+        row = self.dim * _itemsize()
+        texts, offsets = _cut(self._texts, self._offsets, start, stop)
+        metadatas, metadata_offsets = _cut(self._metadatas, self._metadata_offsets, start, stop)
+        return EmbeddingBatch(
+            self.ids[start:stop],
+            self._vectors[start * row : stop * row],
+            self.dim,
+            texts,
+            offsets,
+            metadatas,
+            metadata_offsets,
+        )
+
+    def select(self, rows: list[int]) -> "EmbeddingBatch":
+        """A new batch with just these rows, in this order."""
+        texts, metadatas = self.texts, self.metadatas
+        return EmbeddingBatch.from_columns(
+            [self.ids[i] for i in rows],
+            self.embeddings[rows],
+            [texts[i] for i in rows],
+            [metadatas[i] for i in rows],
+        )
+
+
+def _pack(rows: list[bytes]) -> tuple[bytes, bytes]:
+    """One blob for rows, and the offsets that cut it back into them."""
+    offsets = array("Q", [0])
+    for row in rows:
+        offsets.append(offsets[-1] + len(row))
+    return b"".join(rows), offsets.tobytes()
+
+
+def _unpack(offsets: bytes) -> array:
+    unpacked = array("Q")
+    unpacked.frombytes(offsets)
+    return unpacked
+
+
+def _cut(blob: bytes, offsets: bytes, start: int, stop: int) -> tuple[bytes, bytes]:
+    """Rows [start, stop) of a packed column, as a packed column."""
+    unpacked = _unpack(offsets)
+    base = unpacked[start]
+    return blob[base : unpacked[stop]], array("Q", (o - base for o in unpacked[start : stop + 1])).tobytes()
+
+
+def _join_offsets(columns: list[bytes]) -> bytes:
+    """Offsets of several packed columns' blobs joined end to end."""
+    joined = array("Q", [0])
+    for offsets in columns:
+        base = joined[-1]
+        joined.extend(base + o for o in _unpack(offsets)[1:])
+    return joined.tobytes()
+
+
+def _itemsize() -> int:
+    return {"float16": 2, "float32": 4}[DTYPE]
@@ -1,45 +1,166 @@
-"""Splits files and zip entries into per-worker batches."""
+"""Packs files and zip entries into cost-balanced per-worker batches or queue units."""
 
-import math
+import heapq
 import zipfile
 
+from slackbot.doc_store import StoredDoc
+
+# Rough per-item processing time on one worker slot (parse + chunk + embed).
+# Only the ratios matter for balancing; compare the predicted/actual lines
+# logged by IndexService when recalibrating.
+SECONDS_PER_ITEM = 0.02
+SECONDS_PER_MB_TEXT = 1.5
+SECONDS_PER_PDF_PAGE = 0.04
+# Fallback when a PDF's page count can't be read
+BYTES_PER_PDF_PAGE = 100_000
+# PDFs longer than this are split into page-range items of this many pages
+PAGES_PER_UNIT = 50
+# Small zip entries are grouped into queue units of about this cost, so a
+# worker's queue round-trip isn't paid per entry
+UNIT_SECONDS = 1.0
+
 
 class BatchBuilder:
+    """Estimate each work item's cost and pack items across n_batches workers.
+
+    Items are loose files and individual zip entries, pooled across every
+    document in the run, and assigned largest-first to the least-loaded
+    batch (LPT). Entries of one zip that land in the same batch are merged
+    back into one zip_entries item so the worker opens the archive once.
+    """
 
     def __init__(self, n_batches: int):
         self._n = n_batches
 
-    def build(self, files: list[str]) -> list[tuple[dict, int]]:
-        """Return (work_dict, worker_id) tuples ready for embed.starmap()."""
-        batches: list[dict] = []
-        batches.extend(self._split_files(files))
-        batches.extend(self._split_zips(files))
+    def build(self, docs: list[StoredDoc]) -> list[tuple[dict, int]]:
+        """Return (batch, worker_id) tuples ready for embed.starmap().
+
+        Each batch is {"items": [...], "cost": predicted_seconds}.
+        """
+        bins = self._pack(self._items(docs))
+        batches = [{"items": _merge_zip_entries(items), "cost": cost} for cost, items in bins if items]
+        self._log(batches)
         return [(batch, i) for i, batch in enumerate(batches)]
 
-    def _split_files(self, files: list[str]) -> list[dict]:
-        """Distribute regular files evenly across workers."""
-        regular = [f for f in files if not f.endswith(".zip")]
-        return [{"type": "files", "paths": chunk} for chunk in self._chunk(regular)]
+    def units(self, docs: list[StoredDoc]) -> list[dict]:
+        """Work units for a shared queue, largest first, each with its "cost".
 
-    def _split_zips(self, files: list[str]) -> list[dict]:
-        """Expand each zip and distribute its entries across workers."""
-        batches = []
-        for path in files:
-            if not path.endswith(".zip"):
+        Loose files are one unit each, long PDFs one per page range; a zip's
+        entries are grouped into runs of about UNIT_SECONDS.
+        """
+        units, runs = [], {}
+        for cost, item in sorted(self._items(docs), key=lambda x: x[0], reverse=True):
+            if item["type"] != "zip_entry":
+                units.append({**item, "cost": cost})
                 continue
-            with zipfile.ZipFile(path) as zf:
-                entries = [n for n in zf.namelist() if not n.endswith("/")]
-            for chunk in self._chunk(entries):
-                batches.append({"type": "zip_entries", "zip_path": path, "entries": chunk})
-        return batches
+            run = runs.get(item["zip_path"])
+            if run is None or run["cost"] + cost > UNIT_SECONDS:
+                run = {k: v for k, v in item.items() if k != "entry"}
+                run.update(type="zip_entries", entries=[], cost=0.0)
+                runs[item["zip_path"]] = run
+                units.append(run)
+            run["entries"].append(item["entry"])
+            run["cost"] += cost
+        units.sort(key=lambda u: u["cost"], reverse=True)
+        if units:
+            print(
+                f"[batch] {len(units)} queue units, predicted {sum(u['cost'] for u in units):.1f}s of work "
+                f"(largest {units[0]['cost']:.1f}s)",
+                flush=True,
+            )
+        return units
 
-    def _chunk(self, items: list) -> list[list]:
-        """Split items into roughly equal groups (up to self._n).
+    def _items(self, docs: list[StoredDoc]) -> list[tuple[float, dict]]:
+        """(cost, item) for every file, PDF page range and zip entry."""
+        items = []
+        for d in docs:
+            if d.path.suffix == ".zip":
+                items.extend(self._zip_items(d))
+            elif d.path.suffix == ".pdf":
+                items.extend(self._pdf_items(d))
+            else:
+                item = {"type": "file", "path": str(d.path), "source": d.name, "fingerprint": d.sha256}
+                items.append((_cost(d.name, d.path.stat().st_size), item))
+        return items
 
-        Each chunk is ceil(len(items) / n_batches) items. With 8 GPUs × 4
-        workers per GPU = 32 batches, 100 files produces 32 chunks of ~4 each.
-        """
-        if not items:
-            return []
-        size = math.ceil(len(items) / self._n)
-        return [items[i : i + size] for i in range(0, len(items), size)]
+    def _pdf_items(self, d: StoredDoc) -> list[tuple[float, dict]]:
+        pages = _pdf_page_count(d.path)
+        if pages is None or pages <= PAGES_PER_UNIT:
+            size = d.path.stat().st_size
+            cost = SECONDS_PER_ITEM + SECONDS_PER_PDF_PAGE * (pages or max(1, size // BYTES_PER_PDF_PAGE))
+            return [(cost, {"type": "file", "path": str(d.path), "source": d.name, "fingerprint": d.sha256})]
+        return [
+            (
+                SECONDS_PER_ITEM + SECONDS_PER_PDF_PAGE * (min(start + PAGES_PER_UNIT, pages) - start),
+                {"type": "pdf_pages", "path": str(d.path), "source": d.name, "fingerprint": d.sha256,
+                 "start": start, "end": min(start + PAGES_PER_UNIT, pages)},
+            )
+            for start in range(0, pages, PAGES_PER_UNIT)
+        ]
+
+    def _zip_items(self, d: StoredDoc) -> list[tuple[float, dict]]:
+        # Sizes come from the central directory — nothing is decompressed here
+        with zipfile.ZipFile(d.path) as zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+        return [
+            (
+                _cost(i.filename, i.file_size),
+                {"type": "zip_entry", "zip_path": str(d.path), "source": d.name,
+                 "fingerprint": d.sha256, "entry": i.filename},
+            )
+            for i in infos
+        ]
+
+    def _pack(self, items: list[tuple[float, dict]]) -> list[tuple[float, list[dict]]]:
+        """Longest-processing-time-first greedy packing into self._n bins."""
+        heap = [(0.0, i, []) for i in range(self._n)]
+        for cost, item in sorted(items, key=lambda x: x[0], reverse=True):
+            load, i, bin_items = heapq.heappop(heap)
+            bin_items.append(item)
+            heapq.heappush(heap, (load + cost, i, bin_items))
+        return [(load, bin_items) for load, _, bin_items in sorted(heap, key=lambda b: b[1])]
+
+    def _log(self, batches: list[dict]) -> None:
+        if not batches:
+            return
+        costs = [b["cost"] for b in batches]
+        print(
+            f"[batch] {sum(len(b['items']) for b in batches)} items in {len(batches)} batches, "
+            f"predicted makespan {max(costs):.1f}s (mean {sum(costs) / len(costs):.1f}s)",
+            flush=True,
+        )
+
+
+def _pdf_page_count(path) -> int | None:
+    """Page count from the PDF's trailer/page tree, or None if unreadable."""
+    try:
+        from pypdf import PdfReader
+
+        # len(pages) reads /Root /Pages /Count — no page content is parsed
+        return len(PdfReader(path).pages)
+    except Exception:
+        return None
+
+
+def _cost(name: str, size: int) -> float:
+    if name.lower().endswith(".pdf"):
+        return SECONDS_PER_ITEM + SECONDS_PER_PDF_PAGE * max(1, size // BYTES_PER_PDF_PAGE)
+    return SECONDS_PER_ITEM + SECONDS_PER_MB_TEXT * size / 1e6
+
+
+def _merge_zip_entries(items: list[dict]) -> list[dict]:
+    """Collapse zip_entry items from the same archive into one zip_entries item."""
+    merged: list[dict] = []
+    by_zip: dict[str, dict] = {}
+    for item in items:
+        if item["type"] != "zip_entry":
+            merged.append(item)
+            continue
+        group = by_zip.get(item["zip_path"])
+        if group is None:
+            group = {k: v for k, v in item.items() if k != "entry"}
+            group.update(type="zip_entries", entries=[])
+            by_zip[item["zip_path"]] = group
+            merged.append(group)
+        group["entries"].append(item["entry"])
+    return merged
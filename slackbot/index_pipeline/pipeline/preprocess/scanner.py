@@ -1,38 +1,46 @@
-"""Document scanner — finds new/changed files via ChromaDB comparison."""
+"""Document scanner — finds documents whose content isn't indexed yet."""
 
-from pathlib import Path
 from typing import Callable
 
+from slackbot.doc_store import DocStore, StoredDoc
 from slackbot.modal_app import rag_vol
 
 
 class Scanner:
 
-    def __init__(self, docs_dir: Path, get_indexed: Callable[[], dict[str, str]]):
-        self._docs_dir = docs_dir
+    def __init__(self, store: DocStore, get_indexed: Callable[[], dict[str, str]]):
+        self._store = store
         self._get_indexed = get_indexed
 
-    def scan(self) -> list[str]:
-        """Compare disk fingerprints against ChromaDB, return new/changed files."""
+    def scan(self) -> tuple[list[StoredDoc], list[str]]:
+        """Compare stored content hashes against ChromaDB.
+
+        Returns (unindexed docs, every fingerprint currently in the store).
+        Identity is the content hash, so renames, duplicate uploads and
+        mtime-only changes never reach the GPU. Each distinct content is
+        indexed once, under the first name (alphabetically) that maps to it.
+        """
         rag_vol.reload()
-        if not self._docs_dir.exists():
-            return []
+        if self._store.adopt_legacy():
+            rag_vol.commit()
 
-        # {filename: fingerprint} for files already in ChromaDB
+        # {fingerprint: source} for content already in ChromaDB
         indexed = self._get_indexed()
 
-        # Compare each file's current fingerprint against what's indexed
-        all_files = sorted(p for p in self._docs_dir.iterdir() if p.is_file())
-        new_or_changed = [p for p in all_files if indexed.get(p.name) != self._fingerprint(p)]
-
-        self._log(new_or_changed, len(all_files))
-        return [str(p) for p in new_or_changed]
-
-    def _fingerprint(self, path: Path) -> str:
-        stat = path.stat()
-        return f"{stat.st_mtime_ns}:{stat.st_size}"
-
-    def _log(self, to_index: list[Path], total: int) -> None:
-        print(f"[scan] {len(to_index)} to index, {total - len(to_index)} already indexed", flush=True)
-        for p in to_index:
-            print(f"[scan]   {p.name}", flush=True)
+        docs = self._store.docs()
+        by_content: dict[str, StoredDoc] = {}
+        for doc in docs:
+            by_content.setdefault(doc.sha256, doc)
+        to_index = [d for sha, d in by_content.items() if sha not in indexed]
+
+        self._log(to_index, len(by_content), len(docs))
+        return to_index, list(by_content)
+
+    def _log(self, to_index: list[StoredDoc], unique: int, total: int) -> None:
+        print(
+            f"[scan] {len(to_index)} to index, {unique - len(to_index)} already indexed, "
+            f"{total - unique} duplicate name(s)",
+            flush=True,
+        )
+        for d in to_index:
+            print(f"[scan]   {d.name} ({d.sha256[:12]})", flush=True)
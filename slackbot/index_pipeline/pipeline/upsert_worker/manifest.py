@@ -0,0 +1,155 @@
+"""Manifest — SQLite record of what's in ChromaDB, one row per indexed document."""
+
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+MANIFEST_PATH = "/data/rag/manifest.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    fingerprint TEXT PRIMARY KEY,
+    source      TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    indexed_at  REAL NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending'  -- 'indexed' once every chunk is written
+);
+CREATE INDEX IF NOT EXISTS documents_source ON documents (source);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id    TEXT NOT NULL,
+    fingerprint TEXT NOT NULL REFERENCES documents (fingerprint),
+    PRIMARY KEY (fingerprint, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS chunks_chunk_id ON chunks (chunk_id);
+"""
+
+
+class Manifest:
+    """Documents and their chunk ids, kept alongside the Chroma collection.
+
+    Answers "what's indexed?" in O(documents) instead of paging every chunk's
+    metadata out of Chroma. Rows are written in the same call as the Chroma
+    upsert, after it succeeds, so the manifest never claims chunks Chroma
+    doesn't have — a crash in between only means the document is re-indexed.
+
+    Chunk ids are content-derived, so two versions of a source can share a
+    chunk; orphaned_chunk_ids() is what's safe to delete from Chroma.
+
+    A document's row is 'pending' while its chunks arrive and becomes
+    'indexed' in finalize(), which in the same transaction drops the rows it
+    supersedes. Only indexed rows count as indexed.
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+
+    def record(self, ids: list[str], metadatas: list[dict], state: str = "pending") -> None:
+        """Add upserted chunks to their documents' rows in one transaction.
+
+        New rows start in state; existing rows keep theirs.
+        """
+        by_doc: dict[tuple[str, str], list[str]] = defaultdict(list)
+        for chunk_id, meta in zip(ids, metadatas):
+            if meta.get("source") and meta.get("fingerprint"):
+                by_doc[(meta["source"], meta["fingerprint"])].append(chunk_id)
+
+        now = time.time()
+        with self._lock, self._conn:
+            for (source, fingerprint), chunk_ids in by_doc.items():
+                self._conn.execute(
+                    "INSERT INTO documents (fingerprint, source, indexed_at, state) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (fingerprint) DO UPDATE SET indexed_at = excluded.indexed_at",
+                    (fingerprint, source, now, state),
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO chunks (chunk_id, fingerprint) VALUES (?, ?)",
+                    [(cid, fingerprint) for cid in chunk_ids],
+                )
+                self._conn.execute(
+                    "UPDATE documents SET chunk_count = "
+                    "(SELECT COUNT(*) FROM chunks WHERE fingerprint = ?) WHERE fingerprint = ?",
+                    (fingerprint, fingerprint),
+                )
+
+    def indexed(self) -> dict[str, str]:
+        """{fingerprint: source} for every indexed document."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT fingerprint, source FROM documents WHERE state = 'indexed'"))
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone() is None
+
+    def pending(self, fingerprints: list[str]) -> list[str]:
+        """Fingerprints among these with a pending row — leftovers of an interrupted run."""
+        with self._lock:
+            return [
+                fp for fp in fingerprints
+                if self._conn.execute(
+                    "SELECT 1 FROM documents WHERE fingerprint = ? AND state = 'pending'", (fp,),
+                ).fetchone()
+            ]
+
+    def stale(self, fingerprints: list[str], current: set[str], purge_missing: bool = False) -> list[str]:
+        """Fingerprints superseded once these are indexed.
+
+        current is every fingerprint the doc store still maps a name to;
+        those are never stale, even when their manifest source is a name
+        that now holds other content (the same bytes uploaded under a second
+        name). Of the rest, that's every other version of the same sources,
+        plus — with purge_missing — every document no longer in the store.
+        """
+        keep = set(fingerprints) | current
+        with self._lock:
+            rows = self._conn.execute("SELECT fingerprint, source FROM documents").fetchall()
+        sources = {source for fp, source in rows if fp in set(fingerprints)}
+        return [
+            fp for fp, source in rows
+            if fp not in keep and (source in sources or purge_missing)
+        ]
+
+    def orphaned_chunk_ids(self, fingerprints: list[str]) -> list[str]:
+        """Chunk ids of these documents that no other document also holds."""
+        drop = set(fingerprints)
+        with self._lock:
+            ids = {
+                row[0]
+                for fp in drop
+                for row in self._conn.execute("SELECT chunk_id FROM chunks WHERE fingerprint = ?", (fp,))
+            }
+            return sorted(
+                cid for cid in ids
+                if all(
+                    fp in drop
+                    for (fp,) in self._conn.execute("SELECT fingerprint FROM chunks WHERE chunk_id = ?", (cid,))
+                )
+            )
+
+    def finalize(self, fingerprints: list[str], drop: list[str]) -> None:
+        """Mark fingerprints indexed and delete the dropped rows, atomically."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE documents SET state = 'indexed' WHERE fingerprint = ?", [(fp,) for fp in fingerprints],
+            )
+            self._forget(drop)
+
+    def forget(self, fingerprints: list[str]) -> None:
+        with self._lock, self._conn:
+            self._forget(fingerprints)
+
+    def _forget(self, fingerprints: list[str]) -> None:
+        self._conn.executemany("DELETE FROM chunks WHERE fingerprint = ?", [(fp,) for fp in fingerprints])
+        self._conn.executemany("DELETE FROM documents WHERE fingerprint = ?", [(fp,) for fp in fingerprints])
+
+    def _migrate(self) -> None:
+        # Manifests written before the state column held only complete documents
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if "state" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN state TEXT NOT NULL DEFAULT 'indexed'")
@@ -1,21 +1,32 @@
-"""CPU upsert worker — writes embedded chunks to ChromaDB."""
+"""CPU upsert worker — writes embedded chunks to ChromaDB and the manifest."""
 
+import sys
 from pathlib import Path
 import modal
 from slackbot.modal_app import app, rag_vol
 
+from ..embedding_batch import EmbeddingBatch
+from .manifest import Manifest
+from .write_queue import MAX_ROWS, GroupCommitWriter
+
 CHROMA_DIR = "/data/rag/chroma"
 CHROMA_COLLECTION = "rag_documents"
+# Ids per Chroma delete; upserts are sized by the client's own cap (see _setup)
 UPSERT_BATCH = 5_000
+# Upsert calls accepted at once; they queue on the single writer thread
+UPSERT_INPUTS = 16
 
 upsert_image = modal.Image.debian_slim(python_version="3.12").pip_install("chromadb")
 
+# One container: Chroma's SQLite files on the volume must have a single writer,
+# so upserts queue on its write thread rather than scaling out
 @app.cls(
     image=upsert_image,
     volumes={"/data": rag_vol},
     timeout=60 * 60,
+    max_containers=1,
 )
-@modal.concurrent(max_inputs=1)
+@modal.concurrent(max_inputs=UPSERT_INPUTS)
 class UpsertWorker:
 
     @modal.enter()
@@ -27,40 +38,129 @@ class UpsertWorker:
         client = chromadb.PersistentClient(path=CHROMA_DIR)
         # Opens existing collection or creates a new empty one
         self._collection = client.get_or_create_collection(CHROMA_COLLECTION)
+        # Chroma caps the rows in one call (each its own SQLite transaction) —
+        # a merged group larger than this still takes several transactions
+        self._max_rows = min(MAX_ROWS, client.get_max_batch_size())
+        self._manifest = Manifest()
+        if self._manifest.is_empty() and self._collection.count():
+            self._backfill_manifest()
+        # Every write below goes through this thread, however many inputs are in flight
+        self._writer = GroupCommitWriter(self._commit)
 
     @modal.method()
-    def upsert(self, chunks: list, worker_id: int) -> int:
-        """Write chunks to ChromaDB in batches of UPSERT_BATCH.
+    def upsert(self, chunks: EmbeddingBatch, worker_id: int) -> int:
+        """Queue an EmbeddingBatch from EmbedWorker for the writer and wait for its commit.
 
-        Each chunk is (id, embedding, text, metadata) from EmbedWorker.
+        Concurrent upserts are merged into one commit (see GroupCommitWriter).
+        Chunk ids are content-derived, so re-sending chunks (a retried or
+        resumed run) overwrites them in place. Returns the number written.
         """
-        print(f"  upsert-worker: upserting {len(chunks):,} chunks from worker-{worker_id}...", flush=True)
-        for i in range(0, len(chunks), UPSERT_BATCH):
-            batch = chunks[i : i + UPSERT_BATCH]
-            ids, embeddings, documents, metadatas = zip(*batch)
-            self._collection.upsert(
-                ids=list(ids),
-                embeddings=list(embeddings),
-                documents=list(documents),
-                metadatas=list(metadatas),
-            )
-        return len(chunks)
+        print(
+            f"  upsert-worker: queued {len(chunks):,} chunks ({chunks.nbytes / 1e6:.1f} MB) "
+            f"from worker-{worker_id}",
+            flush=True,
+        )
+        return self._writer.write(chunks).result()
+
+    @modal.method()
+    def begin(self, fingerprints: list[str]) -> None:
+        """Prepare to (re)index these documents.
+
+        Chunks left by an interrupted run for the same content are deleted so
+        the new run starts clean.
+        """
+        self._writer.call(self._begin, fingerprints).result()
+
+    @modal.method()
+    def finalize(self, fingerprints: list[str], current: list[str], purge_missing: bool = False) -> int:
+        """Mark documents indexed and purge the chunks they supersede.
+
+        current is every fingerprint in the doc store; those are always
+        kept. Older versions of the same sources are replaced, and with
+        purge_missing (a full scan) documents no longer in the store are
+        purged too. Chunks a superseded version shares with a kept
+        one (same id, same text) stay. Returns the number of chunks deleted.
+        """
+        return self._writer.call(self._finalize, fingerprints, current, purge_missing).result()
 
     @modal.method()
     def get_indexed_files(self) -> dict[str, str]:
-        """Return {source: fingerprint} for all indexed files.
+        """Return {fingerprint: source} for all indexed documents.
+
+        Used by Scanner to skip content that's already in ChromaDB. Reads
+        the manifest, so cost grows with documents, not chunks.
+        """
+        return self._manifest.indexed()
+
+    @modal.method()
+    def stats(self, since: dict | None = None) -> dict:
+        """Writer throughput (rows/s) and commit-latency histogram.
 
-        Used by Scanner to compare disk fingerprints against what's
-        already in ChromaDB, skipping files that haven't changed.
+        Since the container started, or since an earlier stats() result —
+        the container stays warm across runs, so a run passes the snapshot
+        it took at its start.
         """
-        indexed: dict[str, str] = {}
+        return self._writer.stats(since)
+
+    def _commit(self, chunks: EmbeddingBatch) -> None:
+        """Write one merged group to ChromaDB in calls as large as Chroma allows, then record it in the manifest."""
+        chunks = _dedup(chunks)
+        for i in range(0, len(chunks), self._max_rows):
+            batch = chunks.slice(i, i + self._max_rows)
+            self._collection.upsert(
+                ids=batch.ids,
+                # Chroma stores float32; this is the one conversion on the way in
+                embeddings=batch.embeddings.astype("float32"),
+                documents=batch.texts,
+                metadatas=batch.metadatas,
+            )
+        self._manifest.record(chunks.ids, chunks.metadatas)
+
+    def _begin(self, fingerprints: list[str]) -> None:
+        leftovers = self._manifest.pending(fingerprints)
+        if leftovers:
+            self._delete(self._manifest.orphaned_chunk_ids(leftovers))
+            self._manifest.forget(leftovers)
+
+    def _finalize(self, fingerprints: list[str], current: list[str], purge_missing: bool) -> int:
+        drop = self._manifest.stale(fingerprints, set(current), purge_missing)
+        ids = self._manifest.orphaned_chunk_ids(drop)
+        self._delete(ids)
+        self._manifest.finalize(fingerprints, drop)
+        if ids:
+            print(f"  upsert-worker: purged {len(ids):,} stale chunks from {len(drop)} document(s)", flush=True)
+        return len(ids)
+
+    def _delete(self, ids: list[str]) -> None:
+        for i in range(0, len(ids), UPSERT_BATCH):
+            self._collection.delete(ids=ids[i : i + UPSERT_BATCH])
+
+    def _backfill_manifest(self) -> None:
+        """One-off: build the manifest from a collection indexed before it existed."""
         total = self._collection.count()
+        print(f"  upsert-worker: backfilling manifest from {total:,} chunks...", flush=True)
         page_size = 5_000
         for offset in range(0, total, page_size):
             result = self._collection.get(include=["metadatas"], limit=page_size, offset=offset)
-            for meta in result["metadatas"] or []:
-                source = meta.get("source")
-                fingerprint = meta.get("fingerprint")
-                if source and fingerprint:
-                    indexed[source] = fingerprint
-        return indexed
+            self._manifest.record(result["ids"], result["metadatas"] or [], state="indexed")
+
+
+def _dedup(chunks: EmbeddingBatch) -> EmbeddingBatch:
+    """Drop repeated ids (Chroma rejects them in one upsert); report any that disagree on text."""
+    if len(set(chunks.ids)) == len(chunks):
+        return chunks
+    texts = chunks.texts
+    first: dict[str, int] = {}
+    collisions = 0
+    for i, cid in enumerate(chunks.ids):
+        if cid not in first:
+            first[cid] = i
+        elif texts[first[cid]] != texts[i]:
+            collisions += 1
+    print(
+        f"  upsert-worker: dropped {len(chunks) - len(first):,} repeated chunk ids"
+        f"{f', {collisions} with different text (id collision)' if collisions else ''}",
+        file=sys.stderr if collisions else sys.stdout,
+        flush=True,
+    )
+    return chunks.select(sorted(first.values()))
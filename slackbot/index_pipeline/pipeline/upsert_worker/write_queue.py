@@ -0,0 +1,131 @@
+"""Single-writer group commit — merges concurrent upserts into one write per group."""
+
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from ..embedding_batch import EmbeddingBatch
+
+# A group is committed once it reaches MAX_ROWS or the oldest write in it
+# has waited LATENCY_TARGET seconds, whichever comes first
+MAX_ROWS = 20_000
+LATENCY_TARGET = 0.25
+# Commit latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class GroupCommitWriter:
+    """Own every write to the store on one thread.
+
+    write() queues a batch of rows and returns a Future for the number
+    written; the writer merges whatever is queued into one commit. call()
+    queues any other write (deletes, manifest updates) to run alone, in
+    order with the row writes around it. Any number of threads can
+    produce; only this thread ever writes.
+    """
+
+    def __init__(self, commit: Callable[[EmbeddingBatch], None], max_rows: int = MAX_ROWS, latency: float = LATENCY_TARGET):
+        self._commit = commit
+        self._max_rows = max_rows
+        self._latency = latency
+        self._queue: queue.Queue = queue.Queue()
+        self._held = None  # an item taken while gathering that belongs to the next round
+        self._lock = threading.Lock()
+        self._rows = 0
+        self._commits = 0
+        self._busy = 0.0
+        self._histogram = [0] * len(LATENCY_BUCKETS)
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def write(self, batch: EmbeddingBatch) -> Future:
+        future: Future = Future()
+        self._queue.put(("rows", batch, future))
+        return future
+
+    def call(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        self._queue.put(("call", (fn, args), future))
+        return future
+
+    def stats(self, since: dict | None = None) -> dict:
+        """Rows/s while committing and a commit-latency histogram ({"<=0.1s": n, ...}).
+
+        Totals since the writer started, or since an earlier stats() result
+        passed as since — the writer outlives any one indexing run.
+        """
+        with self._lock:
+            rows, commits, busy, histogram = self._rows, self._commits, self._busy, list(self._histogram)
+        if since:
+            rows -= since["rows"]
+            commits -= since["commits"]
+            busy -= since["busy_s"]
+            histogram = [n - m for n, m in zip(histogram, since["commit_latency"].values())]
+        return {
+            "rows": rows,
+            "commits": commits,
+            "busy_s": busy,
+            "rows_per_s": round(rows / busy) if busy > 0 else 0,
+            "commit_latency": {
+                f"<={b:g}s" if b != float("inf") else f">{LATENCY_BUCKETS[-2]:g}s": n
+                for b, n in zip(LATENCY_BUCKETS, histogram)
+            },
+        }
+
+    def _next(self, timeout: float | None = None):
+        if self._held is not None:
+            item, self._held = self._held, None
+            return item
+        return self._queue.get(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            kind, payload, future = self._next()
+            if kind == "call":
+                fn, args = payload
+                _settle(future, fn, *args)
+            else:
+                self._commit_group([(payload, future)])
+
+    def _commit_group(self, group: list[tuple[EmbeddingBatch, Future]]) -> None:
+        """Gather more row writes until MAX_ROWS or the latency target, then commit them together."""
+        rows = len(group[0][0])
+        deadline = time.monotonic() + self._latency
+        while rows < self._max_rows:
+            try:
+                item = self._next(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item[0] == "call":
+                self._held = item  # runs after this group, keeping order
+                break
+            group.append((item[1], item[2]))
+            rows += len(item[1])
+
+        start = time.monotonic()
+        try:
+            batch = group[0][0] if len(group) == 1 else EmbeddingBatch.concat([b for b, _ in group])
+            self._commit(batch)
+        except Exception as e:
+            print(f"[group-commit] commit of {rows:,} rows failed: {e}", file=sys.stderr, flush=True)
+            for _, future in group:
+                future.set_exception(e)
+            return
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._rows += rows
+            self._commits += 1
+            self._busy += elapsed
+            self._histogram[next(i for i, b in enumerate(LATENCY_BUCKETS) if elapsed <= b)] += 1
+        for b, future in group:
+            future.set_result(len(b))
+
+
+def _settle(future: Future, fn: Callable, *args) -> None:
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
@@ -0,0 +1,53 @@
+"""Shared work queue — embed workers pull units until it drains."""
+
+import queue
+from typing import Iterator
+
+# modal.Queue caps a partition's backlog; units are sized so runs stay well under
+MAX_UNITS = 5000
+PUT_BATCH = 1000
+
+
+class LocalQueue:
+    """In-process stand-in for modal.Queue with the subset drain_stream() uses.
+
+    Like modal.Queue, get() returns None rather than raising when nothing
+    arrives (non-blocking, or past the timeout).
+    """
+
+    def __init__(self):
+        self._q: queue.Queue = queue.Queue()
+
+    def put_many(self, items: list) -> None:
+        for item in items:
+            self._q.put(item)
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        try:
+            return self._q.get(block=block, timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def len(self) -> int:
+        return self._q.qsize()
+
+
+def fill(q, units: list[dict]) -> None:
+    """Enqueue units in order — callers pass them largest-first."""
+    if len(units) > MAX_UNITS:
+        raise ValueError(f"{len(units)} work units exceeds the queue limit of {MAX_UNITS}")
+    for i in range(0, len(units), PUT_BATCH):
+        q.put_many(units[i : i + PUT_BATCH])
+
+
+def take(q) -> Iterator[dict]:
+    """Yield units until the queue is empty.
+
+    The queue is filled before any worker starts, so empty means drained.
+    An empty modal.Queue answers a non-blocking get() with None.
+    """
+    while True:
+        unit = q.get(block=False)
+        if unit is None:
+            return
+        yield unit
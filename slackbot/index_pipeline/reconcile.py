@@ -0,0 +1,38 @@
+"""Periodic reconciliation — full scan for anything the upload fast path missed."""
+
+import time
+
+import modal
+
+from slackbot.modal_app import app, rag_vol
+
+RECONCILE_PERIOD = modal.Period(hours=6)
+
+# pypdf reads PDF page counts for batch cost estimates
+reconcile_image = modal.Image.debian_slim(python_version="3.12").pip_install("pypdf")
+
+
+@app.function(
+    image=reconcile_image,
+    volumes={"/data": rag_vol},
+    schedule=RECONCILE_PERIOD,
+    timeout=60 * 60,
+)
+def reconcile_index():
+    """Diff every stored document against ChromaDB and index what's missing.
+
+    Uploads are indexed directly by IndexHandler; this catches content whose
+    indexing failed or was interrupted, and files adopted from the legacy
+    docs/ dir.
+    """
+    from .jobs import RunLock
+    from .service import IndexService
+
+    lock, job_id = RunLock(), f"reconcile-{int(time.time())}"
+    if not lock.acquire(job_id):
+        print("[reconcile] another index run holds the lock — skipping", flush=True)
+        return
+    try:
+        print(f"[reconcile] {IndexService().index()}", flush=True)
+    finally:
+        lock.release(job_id)
@@ -1,37 +1,214 @@
-"""Orchestrates scan → parallel embed → upsert → summary."""
+"""Orchestrates scan (or given docs) → parallel embed → upsert → summary."""
 
-from pathlib import Path
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import modal
+
+from slackbot.doc_store import DocStore, StoredDoc
 
 from .pipeline.embed_worker import EmbedWorker, WORKERS_PER_GPU
 from .pipeline.upsert_worker import UpsertWorker
 from .pipeline.preprocess.batch_builder import BatchBuilder
 from .pipeline.preprocess.scanner import Scanner
+from .pipeline.work_queue import fill
+from .upsert_dispatcher import UpsertDispatcher
 
 # Number of GPU containers to fan out across
 N_WORKERS = 8
+# Workers pull fine-grained units from a shared queue instead of each taking
+# one pre-packed batch, so a slow file can't hold the whole run back
+WORK_QUEUE = True
+# Embedded chunk groups buffered between the embed streams and the upserts
+RESULT_BUFFER = 16
 
 
 class IndexService:
     """Scans for new docs, embeds in parallel on GPU, upserts to ChromaDB."""
 
-    def __init__(self, docs_dir: Path = Path("/data/rag/docs")):
+    def __init__(self, store: DocStore | None = None):
         self._embed_worker = EmbedWorker()
         self._upsert_worker = UpsertWorker()
-        self._scanner = Scanner(docs_dir, self._upsert_worker.get_indexed_files.remote)
-        self._batch_builder = BatchBuilder(N_WORKERS * WORKERS_PER_GPU)
+        self._store = store or DocStore()
+        self._scanner = Scanner(self._store, self._upsert_worker.get_indexed_files.remote)
+        self._slots = N_WORKERS * WORKERS_PER_GPU
+        self._batch_builder = BatchBuilder(self._slots)
+
+    def index(
+        self,
+        docs: list[StoredDoc] | None = None,
+        progress: Callable[[str], None] | None = None,
+    ) -> str:
+        """Run the indexing pipeline. Blocks until complete.
+
+        With docs, index exactly those (the caller knows they're new content)
+        and skip the global scan, so latency doesn't grow with the corpus.
+        Without, diff the whole store against ChromaDB first. progress, if
+        given, receives a one-line status after each stage advances.
+        """
+        report = progress or (lambda _: None)
+
+        # Find content not yet indexed by comparing hashes to ChromaDB.
+        # Only a full scan purges documents missing from the store.
+        full_scan = docs is None
+        current: list[str] = []
+        if full_scan:
+            docs, current = self._scanner.scan()
+        report(f"Scanned: {len(docs)} document(s) to index")
+        fingerprints = [d.sha256 for d in docs]
+        if fingerprints:
+            self._upsert_worker.begin.remote(fingerprints)
+
+        # Embed on GPU; each streamed group goes to the upsert dispatcher, which
+        # coalesces groups and keeps upserts in flight without blocking this loop
+        start = time.monotonic()
+        # The writer's totals span every run since its container started; this run's are the difference
+        writes_before = self._upsert_worker.stats.remote() if fingerprints else None
+        upserts = UpsertDispatcher(self._upsert_worker.upsert)
+        done = parsed = embedded = cached = 0
+        failed: set[str] = set()
+        with self._embed(docs) as (events, total, predicted):
+            for worker_id, kind, payload in events:
+                if kind == "chunks":
+                    embedded += len(payload)
+                    upserts.submit(payload, worker_id)
+                else:
+                    print(
+                        f"[index] worker-{worker_id}: {payload['units']} unit(s), "
+                        f"predicted {payload['predicted']:.1f}s, actual {payload['seconds']:.1f}s",
+                        flush=True,
+                    )
+                    done += payload["units"]
+                    parsed += payload["docs"]
+                    cached += payload["cached"]
+                    failed.update(payload["failed"])
+                report(_progress(done, total, parsed, embedded, upserts.upserted))
+        embed_seconds = time.monotonic() - start
+        upserted = upserts.close()
+        report(_progress(done, total, parsed, embedded, upserted))
+
+        if total:
+            print(
+                f"[index] makespan: predicted {predicted:.1f}s, actual {time.monotonic() - start:.1f}s — "
+                f"embed {embed_seconds:.1f}s, upsert {upserts.wall_seconds:.1f}s over {upserts.calls} call(s), "
+                f"{upserts.blocked:.1f}s blocked on upserts",
+                flush=True,
+            )
+            writes = self._upsert_worker.stats.remote(writes_before)
+            latency = ", ".join(f"{k} {n}" for k, n in writes["commit_latency"].items() if n)
+            print(
+                f"[index] writer: {writes['rows']:,} rows in {writes['commits']} commit(s), "
+                f"{writes['rows_per_s']:,} rows/s; commit latency {latency or 'n/a'}",
+                flush=True,
+            )
+
+        # Swap in the new versions and drop what they (or deletions) superseded.
+        # Content any name in the store still maps to is kept — re-read now,
+        # so uploads made during the run count too. Documents that lost a work
+        # unit stay pending: not reported as indexed, so the next reconcile
+        # (or upload) indexes them again, and their older versions stay.
+        current = sorted(set(current) | {d.sha256 for d in self._store.docs()})
+        complete = [fp for fp in fingerprints if fp not in failed]
+        purged = self._upsert_worker.finalize.remote(complete, current, full_scan)
+
+        summary = f"Indexed {upserted:,} passages from {len(docs)} document(s)."
+        if cached:
+            summary += f" {cached / embedded:.0%} reused cached embeddings."
+        if purged:
+            summary += f" Purged {purged:,} stale passages."
+        if failed:
+            summary += f" {len(failed)} document(s) failed to parse and will be retried."
+        return summary
+
+    @contextmanager
+    def _embed(self, docs: list[StoredDoc]) -> Iterator[tuple[Iterator, int, float]]:
+        """Start the embed stage. Yields (events, total work units, predicted makespan).
+
+        events are (worker_id, kind, payload) from every worker's stream,
+        as they arrive — see EmbedWorker._embed_events().
+        """
+        if not WORK_QUEUE:
+            # One cost-balanced batch per worker slot (N_WORKERS × WORKERS_PER_GPU)
+            batches = self._batch_builder.build(docs)
+            predicted = max((batch["cost"] for batch, _ in batches), default=0.0)
+            streams = [(i, lambda b=b, i=i: self._embed_worker.embed_stream.remote_gen(b, i)) for b, i in batches]
+            yield _fan_in(streams), len(batches), predicted
+            return
+
+        units = self._batch_builder.units(docs)
+        if not units:
+            yield iter(()), 0, 0.0
+            return
+        # Greedy pulling ends near the mean load, unless one unit is bigger than that
+        predicted = max(sum(u["cost"] for u in units) / self._slots, units[0]["cost"])
+        with modal.Queue.ephemeral() as work:
+            fill(work, units)
+            streams = [
+                (i, lambda i=i: self._embed_worker.drain_stream.remote_gen(work, i))
+                for i in range(min(self._slots, len(units)))
+            ]
+            yield _fan_in(streams), len(units), predicted
+
+
+def _fan_in(streams: list[tuple[int, Callable[[], Iterator]]]) -> Iterator[tuple[int, str, object]]:
+    """Run each worker's generator call on its own thread; yield (worker_id, kind, payload) as events arrive.
+
+    At most RESULT_BUFFER events wait here, so a slow consumer holds the
+    workers back instead of piling results up in memory. When this
+    generator ends early — a worker's error re-raised here, or the consumer
+    stopping — every pump stops at its next event and closes its stream,
+    so no thread stays blocked on the full queue and no remote call is
+    left running for nobody.
+    """
+    events: queue.Queue = queue.Queue(maxsize=RESULT_BUFFER)
+    stop = threading.Event()
 
-    def index(self) -> str:
-        """Run the full indexing pipeline. Blocks until complete."""
+    def put(event: tuple) -> bool:
+        while not stop.is_set():
+            try:
+                events.put(event, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-        # Find new/changed files by comparing disk fingerprints to ChromaDB
-        files = self._scanner.scan()
+    def pump(worker_id: int, open_stream: Callable[[], Iterator]) -> None:
+        stream = None
+        try:
+            stream = open_stream()
+            for kind, payload in stream:
+                if not put((worker_id, kind, payload)):
+                    return
+        except Exception as e:
+            put((worker_id, "error", e))
+        finally:
+            try:
+                if stream is not None:
+                    stream.close()
+            finally:
+                put((worker_id, None, None))
 
-        # Split files into per-worker batches (N_WORKERS × WORKERS_PER_GPU)
-        batches = self._batch_builder.build(files)
+    for worker_id, open_stream in streams:
+        threading.Thread(target=pump, args=(worker_id, open_stream), name=f"embed-{worker_id}", daemon=True).start()
+    live = len(streams)
+    try:
+        while live:
+            worker_id, kind, payload = events.get()
+            if kind is None:
+                live -= 1
+            elif kind == "error":
+                raise payload
+            else:
+                yield worker_id, kind, payload
+    finally:
+        stop.set()
 
-        # Embed on GPU, upsert to ChromaDB as each embed finishes
-        embeddings = self._embed_worker.embed.starmap(batches, order_outputs=False)
-        
-        chunks = sum(self._upsert_worker.upsert.remote(r) for r in embeddings)
 
-        return f"Indexed {chunks:,} passages."
+def _progress(done: int, total: int, parsed: int, embedded: int, upserted: int) -> str:
+    return (
+        f"Indexing: {done}/{total} work units — {parsed:,} docs parsed, "
+        f"{embedded:,} passages embedded, {upserted:,} upserted"
+    )
@@ -0,0 +1,90 @@
+"""Non-blocking upsert dispatch — coalesces embed results and keeps upserts in flight."""
+
+import time
+from collections import deque
+
+from .pipeline.embedding_batch import EmbeddingBatch
+
+# Upsert calls queued ahead of the (single) UpsertWorker container
+UPSERT_IN_FLIGHT = 4
+# Embed groups are merged until at least this many chunks before an upsert
+COALESCE_CHUNKS = 8_192
+
+
+class UpsertDispatcher:
+    """Feed UpsertWorker.upsert via spawn() instead of blocking on remote().
+
+    submit() buffers results until COALESCE_CHUNKS, then spawns one upsert
+    for the lot; at most in_flight spawned calls are outstanding, and
+    submit() only blocks when that many are — so embedding keeps flowing
+    while the upsert container always has its next input queued. Failures
+    surface from whichever call reaps the failed upsert.
+    """
+
+    def __init__(self, upsert, in_flight: int = UPSERT_IN_FLIGHT, coalesce: int = COALESCE_CHUNKS):
+        self._upsert = upsert
+        self._in_flight = in_flight
+        self._coalesce = coalesce
+        self._buffer: list[EmbeddingBatch] = []
+        self._buffered = 0
+        self._worker_id = -1
+        self._calls: deque = deque()
+        self.upserted = 0
+        self.calls = 0
+        self.blocked = 0.0  # seconds submit()/close() spent waiting on upserts
+        self._first_spawn: float | None = None
+        self._last_done: float | None = None
+
+    def submit(self, chunks: EmbeddingBatch, worker_id: int) -> None:
+        if not len(chunks):
+            return
+        if not self._buffer:
+            self._worker_id = worker_id
+        self._buffer.append(chunks)
+        self._buffered += len(chunks)
+        if self._buffered >= self._coalesce:
+            self._spawn()
+        self._reap(block=False)
+
+    def close(self) -> int:
+        """Flush the buffer and wait for every upsert. Returns chunks upserted."""
+        if self._buffer:
+            self._spawn()
+        while self._calls:
+            self._reap(block=True)
+        return self.upserted
+
+    @property
+    def wall_seconds(self) -> float:
+        """First spawn to last completed upsert."""
+        if self._first_spawn is None or self._last_done is None:
+            return 0.0
+        return self._last_done - self._first_spawn
+
+    def _spawn(self) -> None:
+        while len(self._calls) >= self._in_flight:
+            self._reap(block=True)
+        batch = self._buffer[0] if len(self._buffer) == 1 else EmbeddingBatch.concat(self._buffer)
+        self._calls.append(self._upsert.spawn(batch, self._worker_id))
+        self._first_spawn = self._first_spawn or time.monotonic()
+        self.calls += 1
+        self._buffer, self._buffered = [], 0
+
+    def _reap(self, block: bool) -> None:
+        """Collect finished calls in order — the oldest, waiting for it if block."""
+        while self._calls:
+            start = time.monotonic()
+            try:
+                written = self._calls[0].get(timeout=None if block else 0)
+            except TimeoutError:
+                # FunctionCall.get(timeout=0) raises the built-in TimeoutError
+                # (not modal.exception.TimeoutError) while the call is running
+                return
+            finally:
+                if block:
+                    self.blocked += time.monotonic() - start
+            self._calls.popleft()
+            self.upserted += written
+            self._last_done = time.monotonic()
+            if block:
+                return
@@ -12,4 +12,7 @@ data_vol = modal.Volume.from_name("sandbox-data", create_if_missing=True)
 rag_vol = modal.Volume.from_name("sandbox-rag", create_if_missing=True)
 trackio_vol = modal.Volume.from_name("sandbox-trackio", create_if_missing=True)
 
+# Index job state + the cross-container run lock
+index_jobs = modal.Dict.from_name("index-jobs", create_if_missing=True)
+
 TRACKIO_MOUNT = "/root/.cache/huggingface/trackio"
@@ -1,3 +1,3 @@
-from .run import parse_response, run_query
+from .run import parse_response, run_query, stream_query
 
-__all__ = ["run_query", "parse_response"]
+__all__ = ["run_query", "stream_query", "parse_response"]
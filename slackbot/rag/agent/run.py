@@ -6,14 +6,43 @@ import shutil
 from ..config import OUTPUT_DIR
 from .tools import list_output_files
 
+_THINK = re.compile(r"<think>.*?(</think>|$)", flags=re.DOTALL)
+
+# Status lines shown while the agent is calling tools
+_TOOL_STATUS = {
+    "search_documents": "Searching documents…",
+    "execute_python": "Running code…",
+    "list_documents": "Listing documents…",
+}
+
 
 async def run_query(message, *, llm, search_index):
     """Execute a RAG workflow and return the response."""
-    from .workflow import create_workflow
+    return await _start(message, llm, search_index)
 
-    shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
-    workflow = create_workflow(search_index, llm)
-    return await workflow.run(user_msg=message)
+
+async def stream_query(message, *, llm, search_index):
+    """Execute a RAG workflow, yielding (kind, payload) events as it runs.
+
+    kind is "status" (a tool is being called), "delta" (new answer text), or
+    "done" (payload is the final (text, output_files) from parse_response).
+    Only text after the ReAct "Answer:" marker is streamed — thoughts and
+    tool calls are surfaced as status lines instead.
+    """
+    from llama_index.core.agent.workflow import AgentStream, ToolCall
+
+    handler = _start(message, llm, search_index)
+    emitted = 0
+    async for event in handler.stream_events():
+        if isinstance(event, ToolCall):
+            emitted = 0
+            yield "status", _TOOL_STATUS.get(event.tool_name, f"Calling {event.tool_name}…")
+        elif isinstance(event, AgentStream):
+            answer = _answer_so_far(event.response)
+            if answer is not None and len(answer) > emitted:
+                yield "delta", answer[emitted:]
+                emitted = len(answer)
+    yield "done", parse_response(await handler)
 
 
 def parse_response(response) -> tuple[str, list[str]]:
@@ -21,3 +50,20 @@ def parse_response(response) -> tuple[str, list[str]]:
     text = re.sub(r"<think>.*?</think>", "", str(response), flags=re.DOTALL).strip()
     output_files = list_output_files()
     return text, output_files
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _start(message, llm, search_index):
+    """Clear old outputs and start the workflow; returns its awaitable handler."""
+    from .workflow import create_workflow
+
+    shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+    workflow = create_workflow(search_index, llm)
+    return workflow.run(user_msg=message)
+
+
+def _answer_so_far(response: str) -> str | None:
+    """Text after "Answer:" in a partial ReAct step, or None if not answering yet."""
+    _, marker, answer = _THINK.sub("", response).partition("Answer:")
+    return answer.lstrip() if marker else None
@@ -3,7 +3,9 @@
 import subprocess
 import sys
 
-from ..config import DOCS_DIR, OUTPUT_DIR, TOP_K
+from slackbot.doc_store import DocStore
+
+from ..config import OUTPUT_DIR, RAG_ROOT, TOP_K
 
 
 def search_documents(query: str, search_index) -> str:
@@ -15,7 +17,7 @@ def search_documents(query: str, search_index) -> str:
     print(f"[SEARCH] {query!r} -> {len(nodes)} chunks", file=sys.stderr, flush=True)
     if not nodes:
         return "No relevant documents found for this query."
-    chunks = [f"[Source: {n.metadata.get('source', 'unknown')}]\n{n.get_content()}" for n in nodes]
+    chunks = [f"[Source: {_citation(n.metadata)}]\n{n.get_content()}" for n in nodes]
     return "\n\n---\n\n".join(chunks)
 
 
@@ -24,7 +26,7 @@ def execute_python(code: str) -> str:
 
     Pre-installed: pandas, matplotlib, openpyxl, pypdf, python-docx.
     Save output files to /data/rag/output/.
-    Input documents are at /data/rag/docs/.
+    Input document paths come from list_documents().
     """
     code = code.replace("\\n", "\n").replace("\\t", "\t")
     print(f"[EXECUTE_PYTHON] code:\n{code}", file=sys.stderr, flush=True)
@@ -45,15 +47,16 @@ def execute_python(code: str) -> str:
 
 
 def list_documents() -> str:
-    """List all files available in the documents directory (/data/rag/docs/).
+    """List all uploaded documents as "name: path" lines.
 
     Call this to discover what files are available before analyzing them.
-    Returns a newline-separated list of full file paths.
+    The name is what the user uploaded; the path is where its content is
+    stored (identical uploads share one path).
     """
-    if not DOCS_DIR.exists():
-        return "No documents directory found at /data/rag/docs/"
-    paths = [str(f) for f in sorted(DOCS_DIR.rglob("*")) if f.is_file()]
-    return "\n".join(paths) if paths else "No files found in /data/rag/docs/"
+    docs = DocStore(RAG_ROOT).docs()
+    if not docs:
+        return "No documents uploaded yet."
+    return "\n".join(f"{d.name}: {d.path}" for d in docs)
 
 
 def list_output_files() -> list[str]:
@@ -65,6 +68,13 @@ def list_output_files() -> list[str]:
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+def _citation(metadata: dict) -> str:
+    # page comes from page-range parsing, page_label from whole-file PDF parsing
+    source = metadata.get("source", "unknown")
+    page = metadata.get("page") or metadata.get("page_label")
+    return f"{source}, p. {page}" if page else source
+
+
 def _format_result(result: subprocess.CompletedProcess) -> str:
     parts = []
     if result.stdout:
@@ -36,7 +36,7 @@ def create_workflow(search_index: SearchIndex, llm: LLM) -> AgentWorkflow:
         FunctionTool.from_defaults(
             fn=list_documents,
             name="list_documents",
-            description="List all files in /data/rag/docs/.",
+            description="List all uploaded files with their storage paths.",
         ),
     ]
     agent = ReActAgent(
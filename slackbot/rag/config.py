@@ -4,7 +4,6 @@ from pathlib import Path
 
 # --- Paths (all on /data volume, under /data/rag/ to avoid conflicts with ml_agent) ---
 RAG_ROOT = Path("/data/rag")
-DOCS_DIR = RAG_ROOT / "docs"
 CHROMA_DIR = RAG_ROOT / "chroma"
 OUTPUT_DIR = RAG_ROOT / "output"
 
@@ -25,7 +24,7 @@ CHROMA_COLLECTION = "rag_documents"
 SYSTEM_PROMPT = (
     "/no_think\n"
     "You are a document assistant with three tools.\n\n"
-    "**list_documents()** — lists all files in /data/rag/docs/. "
+    "**list_documents()** — lists all uploaded files as \"name: path\". "
     "Call this first when the user mentions a file, to confirm it exists and get the exact path.\n\n"
     "**search_documents(query)** — full-text search over indexed documents. "
     "Use for questions about document content, concepts, or facts.\n\n"
@@ -37,6 +36,6 @@ SYSTEM_PROMPT = (
     "- When the user mentions a file: call list_documents first, then execute_python with the exact path.\n"
     "- For document questions: call search_documents first, then answer from results.\n"
     "- Never guess file contents or paths — use tools to check.\n"
-    "- Be concise. Cite sources from search results.\n"
+    "- Be concise. Cite sources from search results, with page numbers when given.\n"
     "- Do not use emojis in responses."
 )
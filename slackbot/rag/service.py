@@ -86,3 +86,11 @@ class RagService:
 
         response = asyncio.run(run_query(message, llm=self._llm, search_index=self._search_index))
         return parse_response(response)
+
+    @modal.method()
+    async def query_stream(self, message: str):
+        """Streaming variant of query. Yields (kind, payload) events — see stream_query."""
+        from slackbot.rag.agent import stream_query
+
+        async for event in stream_query(message, llm=self._llm, search_index=self._search_index):
+            yield event
@@ -1,3 +1,5 @@
+from .dedup import EventDedup
+from .dispatcher import AsyncDispatcher, Dispatcher, QueueFull
 from .router import Router
 
-__all__ = ["Router"]
+__all__ = ["AsyncDispatcher", "Dispatcher", "EventDedup", "QueueFull", "Router"]
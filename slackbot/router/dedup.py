@@ -0,0 +1,66 @@
+"""Event dedup — bounded TTL/LRU cache of Slack event ids."""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEDUP_TTL = 60 * 60  # Slack retries for up to ~1 hour
+DEDUP_MAX_KEYS = 10_000
+
+
+class EventDedup:
+    """Remember recently seen Slack events so duplicates are acked without work.
+
+    Keys are the envelope's event_id and the inner event's client_msg_id
+    (namespaced by event type, since app_mention and message events for the
+    same post share a client_msg_id). Entries expire after ttl seconds and the
+    oldest are evicted once max_keys is reached.
+    """
+
+    def __init__(self, ttl: float = DEDUP_TTL, max_keys: int = DEDUP_MAX_KEYS):
+        self._ttl = ttl
+        self._max_keys = max_keys
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_duplicate(self, payload: dict) -> bool:
+        """Record the payload's keys; True if any of them was already seen."""
+        keys = self._keys(payload)
+        if not keys:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            duplicate = any(k in self._seen for k in keys)
+            for k in keys:
+                self._seen[k] = now
+                self._seen.move_to_end(k)
+            while len(self._seen) > self._max_keys:
+                self._seen.popitem(last=False)
+            if duplicate:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return duplicate
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._seen)}
+
+    def _keys(self, payload: dict) -> list[str]:
+        keys = []
+        if payload.get("event_id"):
+            keys.append(f"event:{payload['event_id']}")
+        event = payload.get("event") or {}
+        if event.get("client_msg_id"):
+            keys.append(f"{event.get('type')}:{event['client_msg_id']}")
+        return keys
+
+    def _expire(self, now: float) -> None:
+        # Insertion order == last-seen order, so expired keys are at the front
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self._ttl:
+                break
+            del self._seen[key]
@@ -0,0 +1,217 @@
+"""Dispatcher — bounded worker pool with per-thread ordering for Slack events."""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+
+DISPATCH_WORKERS = 16
+MAX_QUEUE_DEPTH = 64
+
+# Async handlers hold no thread while waiting on Modal/Slack, so far more can be in flight
+ASYNC_DISPATCH_WORKERS = 1024
+ASYNC_MAX_QUEUE_DEPTH = 4096
+
+
+class QueueFull(Exception):
+    """Raised when the admission queue is at its depth limit."""
+
+
+class Dispatcher:
+    """Run handlers on a fixed pool of worker threads.
+
+    Jobs share a key (the Slack thread_ts). Jobs with the same key run one at
+    a time in submission order; jobs with different keys run in parallel up to
+    the pool size. Anything beyond that waits in an admission queue capped at
+    max_depth.
+    """
+
+    def __init__(self, workers: int = DISPATCH_WORKERS, max_depth: int = MAX_QUEUE_DEPTH):
+        self._workers = workers
+        self._max_depth = max_depth
+        self._cond = threading.Condition()
+        self._pending: dict[str, deque] = {}  # key -> jobs waiting for that key
+        self._ready: deque[str] = deque()     # keys whose next job can start now
+        self._active: set[str] = set()        # keys with a job running
+        self._queued = 0
+        self._waits = WaitStats()
+        self._started = False
+
+    def start(self) -> None:
+        """Start the worker threads. Called after snapshot restore."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self._workers):
+            threading.Thread(target=self._work, name=f"dispatch-{i}", daemon=True).start()
+
+    def submit(self, key: str, fn, *args) -> int:
+        """Queue fn(*args) under key. Returns 0 if it starts immediately,
+        otherwise its place in line (1 = next to start). Raises QueueFull at
+        the depth limit.
+        """
+        with self._cond:
+            if self._queued >= self._max_depth:
+                raise QueueFull(f"{self._queued} events already queued")
+            jobs = self._pending.setdefault(key, deque())
+            jobs.append((fn, args, time.monotonic()))
+            if key not in self._active and len(jobs) == 1:
+                self._ready.append(key)
+            self._queued += 1
+            place = self._place(key, len(jobs))
+            self._cond.notify()
+        return place
+
+    def stats(self) -> dict:
+        """Queue depth, running jobs, and wait-time percentiles (seconds)."""
+        with self._cond:
+            return {"queued": self._queued, "running": len(self._active), **self._waits.summary()}
+
+    def _place(self, key: str, jobs: int) -> int:
+        """Place in line of key's newest job, or 0 if a worker takes it now.
+
+        Ahead of it are the keys ready before it, less those idle workers
+        take straight away, and its thread's earlier jobs. (Between those,
+        its key rejoins _ready behind whatever is there then, so a thread
+        with a backlog may wait for more than this.)
+        """
+        idle = max(self._workers - len(self._active), 0)
+        if key in self._active:
+            # Its key rejoins _ready behind every key there now
+            ready_ahead, own_ahead = len(self._ready), jobs - 1
+        elif jobs == 1:
+            ready_ahead, own_ahead = self._ready.index(key), 0
+            if ready_ahead < idle:
+                return 0
+        else:
+            # key's entry in _ready is for its first job, which is ahead of this one
+            ready_ahead, own_ahead = self._ready.index(key) + 1, jobs - 2
+        return max(ready_ahead - idle, 0) + own_ahead + 1
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                key = self._ready.popleft()
+                fn, args, enqueued = self._pending[key].popleft()
+                self._active.add(key)
+                self._queued -= 1
+                self._waits.add(time.monotonic() - enqueued)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[dispatch] {key}: {e}", file=sys.stderr, flush=True)
+            finally:
+                self._finish(key)
+
+    def _finish(self, key: str) -> None:
+        with self._cond:
+            self._active.discard(key)
+            if self._pending[key]:
+                self._ready.append(key)
+                self._cond.notify()
+            else:
+                del self._pending[key]
+
+
+class AsyncDispatcher:
+    """asyncio counterpart of Dispatcher — same ordering and admission rules,
+    but jobs are coroutines run as tasks on the event loop.
+    """
+
+    def __init__(self, workers: int = ASYNC_DISPATCH_WORKERS, max_depth: int = ASYNC_MAX_QUEUE_DEPTH):
+        self._workers = workers
+        self._max_depth = max_depth
+        self._slots = asyncio.Semaphore(workers)
+        self._tails: dict[str, asyncio.Task] = {}  # key -> its most recently submitted job
+        self._backlog: dict[str, int] = {}         # key -> its jobs not started yet
+        self._active: set[str] = set()             # keys with a job running
+        self._queued = 0
+        self._ready = 0  # jobs whose thread is clear, waiting for a slot
+        self._running = 0
+        self._waits = WaitStats()
+
+    def submit(self, key: str, fn, *args) -> int:
+        """Schedule await fn(*args) under key. Must be called from the event loop.
+
+        Returns 0 if it starts immediately, otherwise its place in line
+        (1 = next to start). Raises QueueFull at the depth limit.
+        """
+        if self._queued >= self._max_depth:
+            raise QueueFull(f"{self._queued} events already queued")
+        prev = self._tails.get(key)
+        place = self._place(key, prev is not None)
+        self._queued += 1
+        self._backlog[key] = self._backlog.get(key, 0) + 1
+        if prev is None:
+            self._ready += 1
+        task = asyncio.get_running_loop().create_task(self._run(key, prev, fn, args, time.monotonic()))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+        return place
+
+    def stats(self) -> dict:
+        """Queue depth, running jobs, and wait-time percentiles (seconds)."""
+        return {"queued": self._queued, "running": self._running, **self._waits.summary()}
+
+    async def _run(self, key: str, prev: asyncio.Task | None, fn, args, enqueued: float) -> None:
+        # Wait for the previous job in this thread, ignoring how it ended
+        if prev is not None:
+            await asyncio.wait([prev])
+            self._ready += 1
+        async with self._slots:
+            self._ready -= 1
+            self._queued -= 1
+            self._backlog[key] -= 1
+            if not self._backlog[key]:
+                del self._backlog[key]
+            self._active.add(key)
+            self._running += 1
+            self._waits.add(time.monotonic() - enqueued)
+            try:
+                await fn(*args)
+            except Exception as e:
+                print(f"[dispatch] {key}: {e}", file=sys.stderr, flush=True)
+            finally:
+                self._running -= 1
+                self._active.discard(key)
+
+    def _place(self, key: str, behind: bool) -> int:
+        """Place in line of a job about to be queued for key, or 0 if it can
+        start now; behind is whether key already has an unfinished job.
+        Same count as Dispatcher._place — slots are handed out in order.
+        """
+        free = max(self._workers - self._running, 0)
+        if not behind:
+            return 0 if self._ready < free else self._ready - free + 1
+        own_ahead = self._backlog.get(key, 0)
+        if key not in self._active:
+            own_ahead = max(own_ahead - 1, 0)  # its first job is already counted in _ready
+        return max(self._ready - free, 0) + own_ahead + 1
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+
+class WaitStats:
+    """Rolling window of queue wait times."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def summary(self) -> dict:
+        if not self._samples:
+            return {"wait_p50": 0.0, "wait_p95": 0.0, "wait_max": 0.0}
+        s = sorted(self._samples)
+        return {
+            "wait_p50": s[len(s) // 2],
+            "wait_p95": s[min(len(s) - 1, int(len(s) * 0.95))],
+            "wait_max": s[-1],
+        }
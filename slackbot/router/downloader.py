@@ -0,0 +1,162 @@
+"""Download engine — parallel, streamed Slack file downloads into the doc store."""
+
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from slackbot.doc_store import DocStore
+
+DOWNLOAD_WORKERS = 4
+CHUNK_BYTES = 1 << 20  # 1 MiB reads keep memory flat regardless of file size
+TIMEOUT = 120.0
+
+
+class Download(NamedTuple):
+    name: str
+    path: Path
+    sha256: str
+    size: int
+    seconds: float
+    new: bool  # False if the store already held these bytes
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.size / 1e6 / self.seconds if self.seconds else 0.0
+
+
+class Downloader:
+    """Stream Slack files into a DocStore with a pooled HTTP client.
+
+    Each file is written in CHUNK_BYTES pieces to a temp file in the store's
+    staging dir, hashed as it streams, and handed to the store only once
+    complete — a failed download never leaves a partial file behind.
+    """
+
+    def __init__(self, store: DocStore, workers: int = DOWNLOAD_WORKERS):
+        self._store = store
+        self._workers = workers
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="download")
+        self._http = None
+
+    def fetch(self, files: list[dict]) -> list[Download]:
+        """Download files in parallel on the thread pool. Skips files without a URL."""
+        self._store.staging.mkdir(parents=True, exist_ok=True)
+        results = list(self._pool.map(self._fetch_one, files))
+        return [d for d in results if d]
+
+    async def afetch(self, files: list[dict]) -> list[Download]:
+        """Async variant of fetch — at most `workers` downloads in flight.
+
+        Volume writes and the store update run on threads so a large upload
+        never stalls the event loop.
+        """
+        import httpx
+
+        await asyncio.to_thread(self._store.staging.mkdir, parents=True, exist_ok=True)
+        slots = asyncio.Semaphore(self._workers)
+        async with httpx.AsyncClient(headers=_auth(), timeout=TIMEOUT, follow_redirects=True) as http:
+
+            async def fetch_one(f: dict) -> Download | None:
+                url, name = _source(f)
+                if not url:
+                    return None
+                async with slots, http.stream("GET", url) as resp:
+                    resp.raise_for_status()
+                    async with _Sink(self._store, name) as sink:
+                        async for chunk in resp.aiter_bytes(CHUNK_BYTES):
+                            await sink.awrite(chunk)
+                return _log(sink.result)
+
+            results = await asyncio.gather(*(fetch_one(f) for f in files))
+        return [d for d in results if d]
+
+    def _fetch_one(self, f: dict) -> Download | None:
+        url, name = _source(f)
+        if not url:
+            return None
+        with self._client().stream("GET", url) as resp:
+            resp.raise_for_status()
+            with _Sink(self._store, name) as sink:
+                for chunk in resp.iter_bytes(CHUNK_BYTES):
+                    sink.write(chunk)
+        return _log(sink.result)
+
+    def _client(self):
+        # Created on first use so no sockets are captured in the memory snapshot
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.Client(
+                headers=_auth(),
+                timeout=TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self._workers),
+            )
+        return self._http
+
+
+class _Sink:
+    """Staging file + running SHA-256; added to the store atomically on success."""
+
+    def __init__(self, store: DocStore, name: str):
+        self._store = store
+        self._name = name
+        self._tmp = store.staging / f"{uuid.uuid4().hex}.part"
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self.result: Download | None = None
+
+    def __enter__(self) -> "_Sink":
+        self._file = self._tmp.open("wb")
+        self._start = time.monotonic()
+        return self
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self._size += len(chunk)
+
+    def __exit__(self, exc_type, *_) -> None:
+        self._file.close()
+        if exc_type is not None:
+            self._tmp.unlink(missing_ok=True)
+            return
+        elapsed = time.monotonic() - self._start
+        doc, new = self._store.add(self._name, self._tmp, self._hash.hexdigest())
+        self.result = Download(doc.name, doc.path, doc.sha256, self._size, elapsed, new)
+
+    # Async use: the same file work, each step on a thread off the event loop
+
+    async def __aenter__(self) -> "_Sink":
+        return await asyncio.to_thread(self.__enter__)
+
+    async def awrite(self, chunk: bytes) -> None:
+        await asyncio.to_thread(self.write, chunk)
+
+    async def __aexit__(self, *exc) -> None:
+        await asyncio.to_thread(self.__exit__, *exc)
+
+
+def _source(f: dict) -> tuple[str | None, str]:
+    """(download URL, safe filename) for a Slack file object."""
+    url = f.get("url_private_download") or f.get("url_private")
+    # Slack names are user-controlled — keep only the final path component
+    return url, Path(f.get("name") or f["id"]).name
+
+
+def _auth() -> dict[str, str]:
+    return {"Authorization": f"Bearer {os.environ['SLACK_BOT_TOKEN']}"}
+
+
+def _log(d: Download) -> Download:
+    print(
+        f"[download] {d.name}: {d.size / 1e6:.1f} MB in {d.seconds:.1f}s "
+        f"({d.mb_per_s:.1f} MB/s) sha256={d.sha256[:12]}{'' if d.new else ' (duplicate)'}",
+        flush=True,
+    )
+    return d
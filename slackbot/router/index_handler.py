@@ -1,43 +1,83 @@
-"""Handle file uploads — download to volume and trigger indexing."""
+"""Handle file uploads — download to volume and queue an indexing job."""
 
-import os
-import urllib.request
-from pathlib import Path
+import asyncio
 
-_DOCS_DIR = Path("/data/rag/docs")
+from slackbot.doc_store import DocStore, StoredDoc
+from slackbot.index_pipeline.jobs import IndexJobs
+
+from .downloader import Download, Downloader
+from .live_message import AsyncLiveMessage, LiveMessage
+
+_QUEUED = ":hourglass_flowing_sand: Queued for indexing…"
 
 
 class IndexHandler:
-    """Download Slack-uploaded files to the rag volume and trigger indexing."""
+    """Download Slack-uploaded files into the doc store and queue indexing.
+
+    Indexing runs as a background job (IndexJobs), so the handler returns as
+    soon as the files are saved; progress is edited into one thread message.
+    """
 
     def __init__(self, indexer, vol):
-        self._indexer = indexer
+        self._jobs = IndexJobs(indexer)
         self._vol = vol
+        self._downloader = Downloader(DocStore())
 
-    def handle(self, files: list[dict], say) -> None:
-        saved = self._download(files)
+    def handle(self, files: list[dict], thread_ts: str, channel: str, say, client) -> None:
+        downloads = self._downloader.fetch(files)
         self._vol.commit()
-        if not saved:
+        if not downloads:
             say("No downloadable files found in the shared items.")
             return
-        say(f"Saved {len(saved)} file(s): {', '.join(saved)}")
-        self._index(say)
-
-    def _download(self, files: list[dict]) -> list[str]:
-        _DOCS_DIR.mkdir(parents=True, exist_ok=True)
-        saved = []
-        for f in files:
-            url = f.get("url_private_download") or f.get("url_private")
-            if not url:
-                continue
-            filename = f.get("name", f["id"])
-            req = urllib.request.Request(url)
-            req.add_header("Authorization", f"Bearer {os.environ['SLACK_BOT_TOKEN']}")
-            with urllib.request.urlopen(req, timeout=120) as resp:
-                (_DOCS_DIR / filename).write_bytes(resp.read())
-            saved.append(filename)
-        return saved
-
-    def _index(self, say) -> None:
-        result = self._indexer.index()
-        say(result)
+        say(_saved_message(downloads))
+        docs = _new_content(downloads)
+        if docs:
+            self._jobs.submit(docs, LiveMessage.post(client, channel, thread_ts, text=_QUEUED))
+
+    async def ahandle(self, files: list[dict], thread_ts: str, channel: str, say, client) -> None:
+        """Async variant of handle — downloads run concurrently on the event loop."""
+        downloads = await self._downloader.afetch(files)
+        await self._vol.commit.aio()
+        if not downloads:
+            await say("No downloadable files found in the shared items.")
+            return
+        await say(_saved_message(downloads))
+        docs = _new_content(downloads)
+        if docs:
+            live = await AsyncLiveMessage.post(client, channel, thread_ts, text=_QUEUED)
+            # submit() writes job status to a modal.Dict, a blocking call
+            await asyncio.to_thread(self._jobs.submit, docs, _FromThread(live, asyncio.get_running_loop()))
+
+
+class _FromThread:
+    """Listener that forwards job progress from the runner thread to an
+    AsyncLiveMessage on the event loop, one edit at a time and in order.
+    """
+
+    def __init__(self, live: AsyncLiveMessage, loop: asyncio.AbstractEventLoop):
+        self._live = live
+        self._loop = loop
+        self._edits = asyncio.Lock()
+
+    def update(self, text: str) -> None:
+        asyncio.run_coroutine_threadsafe(self._serial(self._live.update, text), self._loop)
+
+    def finish(self, text: str) -> None:
+        asyncio.run_coroutine_threadsafe(self._serial(self._live.finish, text), self._loop)
+
+    async def _serial(self, edit, text: str) -> None:
+        async with self._edits:
+            await edit(text)
+
+
+def _new_content(downloads: list[Download]) -> list[StoredDoc]:
+    """Docs whose bytes weren't in the store before — the only ones needing indexing."""
+    return [StoredDoc(d.name, d.sha256, d.path) for d in downloads if d.new]
+
+
+def _saved_message(downloads: list[Download]) -> str:
+    message = f"Saved {len(downloads)} file(s): {', '.join(d.name for d in downloads)}"
+    duplicates = sum(not d.new for d in downloads)
+    if duplicates:
+        message += f" ({duplicates} identical to earlier uploads, not re-indexed)"
+    return message
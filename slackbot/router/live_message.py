@@ -0,0 +1,77 @@
+"""Live message — a Slack post edited in place as streamed text arrives."""
+
+import time
+
+# chat.update is Tier 3 (~50/min); one edit per 1.5s per message stays well under
+UPDATE_INTERVAL = 1.5
+PLACEHOLDER = ":hourglass_flowing_sand: Thinking…"
+
+
+class _Throttled:
+    """Edit bookkeeping shared by the sync and async variants."""
+
+    def __init__(self, client, channel: str, ts: str, interval: float, shown: str = PLACEHOLDER):
+        self._client = client
+        self._channel = channel
+        self._ts = ts
+        self._interval = interval
+        self._shown = shown
+        self._last_edit = time.monotonic()
+
+    def _changed(self, text: str) -> bool:
+        return bool(text) and text != self._shown
+
+    def _due(self, text: str) -> bool:
+        return self._changed(text) and time.monotonic() - self._last_edit >= self._interval
+
+    def _mark(self, text: str) -> None:
+        self._shown = text
+        self._last_edit = time.monotonic()
+
+
+class LiveMessage(_Throttled):
+    """Post a placeholder, then coalesce updates into throttled chat_update edits."""
+
+    @classmethod
+    def post(
+        cls, client, channel: str, thread_ts: str, text: str = PLACEHOLDER, interval: float = UPDATE_INTERVAL,
+    ) -> "LiveMessage":
+        resp = client.chat_postMessage(channel=channel, text=text, thread_ts=thread_ts)
+        return cls(client, channel, resp["ts"], interval, text)
+
+    def update(self, text: str) -> None:
+        """Show text if the throttle interval has passed; otherwise it's picked up later."""
+        if self._due(text):
+            self._edit(text)
+
+    def finish(self, text: str) -> None:
+        """Show the final text unconditionally."""
+        if self._changed(text):
+            self._edit(text)
+
+    def _edit(self, text: str) -> None:
+        self._client.chat_update(channel=self._channel, ts=self._ts, text=text)
+        self._mark(text)
+
+
+class AsyncLiveMessage(_Throttled):
+    """LiveMessage for slack_sdk's AsyncWebClient."""
+
+    @classmethod
+    async def post(
+        cls, client, channel: str, thread_ts: str, text: str = PLACEHOLDER, interval: float = UPDATE_INTERVAL,
+    ) -> "AsyncLiveMessage":
+        resp = await client.chat_postMessage(channel=channel, text=text, thread_ts=thread_ts)
+        return cls(client, channel, resp["ts"], interval, text)
+
+    async def update(self, text: str) -> None:
+        if self._due(text):
+            await self._edit(text)
+
+    async def finish(self, text: str) -> None:
+        if self._changed(text):
+            await self._edit(text)
+
+    async def _edit(self, text: str) -> None:
+        await self._client.chat_update(channel=self._channel, ts=self._ts, text=text)
+        self._mark(text)
@@ -1,5 +1,6 @@
 """Handle hf: messages — run prompt in the ML sandbox."""
 
+import asyncio
 import json
 import threading
 
@@ -14,26 +15,41 @@ class MlHandler:
         self._sandbox = None
         self._stdout = None
         self._lock = threading.Lock()
+        # The Bot runs either the sync or the async router, never both, so
+        # each path only needs to exclude itself
+        self._alock = asyncio.Lock()
 
     def handle(self, prompt: str, thread_ts: str, say) -> None:
         """Send a prompt to the GPU sandbox and relay the response back to Slack."""
-        session = f"agent-{thread_ts}".replace(".", "-")
-        request = json.dumps({"message": prompt, "session": session})
-
         with self._lock:
             self._ensure_sandbox()
-            self._sandbox.stdin.write(request + "\n")
+            self._sandbox.stdin.write(_request(prompt, thread_ts) + "\n")
             self._sandbox.stdin.drain()
+            response = self._read_response()
 
-            lines = []
-            for line in self._stdout:
-                if END_SENTINEL in line:
-                    break
-                lines.append(line)
-
-        response = "\n".join(lines).strip()
         say(response or "(No response from agent)")
 
+    async def ahandle(self, prompt: str, thread_ts: str, say) -> None:
+        """Async variant of handle. The sandbox speaks one turn at a time over
+        stdin/stdout, so turns still serialize — on an asyncio.Lock, so a
+        waiting turn holds no executor thread.
+        """
+        async with self._alock:
+            await asyncio.to_thread(self._ensure_sandbox)
+            self._sandbox.stdin.write(_request(prompt, thread_ts) + "\n")
+            await self._sandbox.stdin.drain.aio()
+            response = await asyncio.to_thread(self._read_response)
+
+        await say(response or "(No response from agent)")
+
+    def _read_response(self) -> str:
+        lines = []
+        for line in self._stdout:
+            if END_SENTINEL in line:
+                break
+            lines.append(line)
+        return "\n".join(lines).strip()
+
     def _is_alive(self):
         # poll() returns None while running, exit code when done
         if self._sandbox is None:
@@ -47,3 +63,8 @@ class MlHandler:
             self._sandbox = self._get_sb()
             # Reuse a single iterator across turns to maintain position
             self._stdout = iter(self._sandbox.stdout)
+
+
+def _request(prompt: str, thread_ts: str) -> str:
+    session = f"agent-{thread_ts}".replace(".", "-")
+    return json.dumps({"message": prompt, "session": session})
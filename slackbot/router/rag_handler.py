@@ -1,7 +1,9 @@
-"""Handle RAG queries — call the remote LLM and upload output files."""
+"""Handle RAG queries — stream the remote LLM's answer and upload output files."""
 
 from pathlib import Path
 
+from .live_message import AsyncLiveMessage, LiveMessage
+
 
 class RagHandler:
     """Query the RAG agent and upload any output files back to Slack."""
@@ -11,10 +13,41 @@ class RagHandler:
         self._vol = vol
 
     def handle(self, message: str, thread_ts: str, channel: str, say, client) -> None:
-        text, output_files = self._rag.query.remote(message)
-        say(text)
-        if output_files:
-            self._upload_files(output_files, channel, thread_ts, client)
+        """Stream the answer into a single message, edited as tokens arrive."""
+        live = LiveMessage.post(client, channel, thread_ts)
+        answer = ""
+        try:
+            for kind, payload in self._rag.query_stream.remote_gen(message):
+                if kind == "done":
+                    text, output_files = payload
+                    live.finish(text or "(No response)")
+                    if output_files:
+                        self._upload_files(output_files, channel, thread_ts, client)
+                else:
+                    answer, shown = _fold(answer, kind, payload)
+                    live.update(shown)
+        except Exception as e:
+            # Replace the placeholder rather than leave it "Thinking…" forever
+            print(f"[rag] error: {e}", flush=True)
+            live.finish(_failed(answer, e))
+
+    async def ahandle(self, message: str, thread_ts: str, channel: str, say, client) -> None:
+        """Async variant of handle for the AsyncApp router."""
+        live = await AsyncLiveMessage.post(client, channel, thread_ts)
+        answer = ""
+        try:
+            async for kind, payload in self._rag.query_stream.remote_gen.aio(message):
+                if kind == "done":
+                    text, output_files = payload
+                    await live.finish(text or "(No response)")
+                    if output_files:
+                        await self._aupload_files(output_files, channel, thread_ts, client)
+                else:
+                    answer, shown = _fold(answer, kind, payload)
+                    await live.update(shown)
+        except Exception as e:
+            print(f"[rag] error: {e}", flush=True)
+            await live.finish(_failed(answer, e))
 
     def _upload_files(self, output_files: list[str], channel: str, thread_ts: str, client) -> None:
         """Upload files generated by execute_python (charts, CSVs, etc.) to the thread."""
@@ -25,3 +58,25 @@ class RagHandler:
                     channel=channel, thread_ts=thread_ts,
                     file=str(p), filename=p.name, title=p.name,
                 )
+
+    async def _aupload_files(self, output_files: list[str], channel: str, thread_ts: str, client) -> None:
+        await self._vol.reload.aio()
+        for p in [Path(f) for f in output_files]:
+            if p.exists():
+                await client.files_upload_v2(
+                    channel=channel, thread_ts=thread_ts,
+                    file=str(p), filename=p.name, title=p.name,
+                )
+
+
+def _fold(answer: str, kind: str, payload: str) -> tuple[str, str]:
+    """Fold a status/delta event into the answer so far. Returns (answer, text to show)."""
+    if kind == "status":
+        return answer, f"{answer}\n\n_{payload}_".strip()
+    answer += payload
+    return answer, answer
+
+
+def _failed(answer: str, error: Exception) -> str:
+    """Final text for a stream that raised: whatever was answered, then the error."""
+    return f"{answer}\n\n:x: Error: {error}".strip()
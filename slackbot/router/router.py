@@ -8,7 +8,11 @@ from .rag_handler import RagHandler
 
 
 class Router:
-    """Parse Slack @mention events and dispatch to the correct handler."""
+    """Parse Slack @mention events and dispatch to the correct handler.
+
+    handle() is the threaded path for slack-bolt's App/WebClient; ahandle()
+    is the asyncio path for AsyncApp/AsyncWebClient.
+    """
 
     def __init__(self, indexer, rag, ml_sb_fn, vol):
         self._index = IndexHandler(indexer, vol)
@@ -16,16 +20,12 @@ class Router:
         self._rag = RagHandler(rag, vol)
 
     def handle(self, event: dict, client) -> None:
-        channel = event["channel"]
-        thread_ts = event.get("thread_ts", event["ts"])
+        channel, thread_ts, message = _parse(event)
         say = lambda text: client.chat_postMessage(channel=channel, text=text, thread_ts=thread_ts)
 
-        # Strip the @mention tag to get the raw message
-        message = re.sub(r"<@[A-Z0-9]+>", "", event.get("text", "")).strip()
-
         try:
             if event.get("files"):
-                self._index.handle(event["files"], say)
+                self._index.handle(event["files"], thread_ts, channel, say, client)
             elif message.lower().startswith("hf:"):
                 self._ml.handle(message[3:].strip(), thread_ts, say)
             else:
@@ -34,3 +34,28 @@ class Router:
         except Exception as e:
             print(f"[router] error: {e}", flush=True)
             say(f":x: Error: {e}")
+
+    async def ahandle(self, event: dict, client) -> None:
+        channel, thread_ts, message = _parse(event)
+
+        async def say(text):
+            return await client.chat_postMessage(channel=channel, text=text, thread_ts=thread_ts)
+
+        try:
+            if event.get("files"):
+                await self._index.ahandle(event["files"], thread_ts, channel, say, client)
+            elif message.lower().startswith("hf:"):
+                await self._ml.ahandle(message[3:].strip(), thread_ts, say)
+            else:
+                await self._rag.ahandle(message, thread_ts, channel, say, client)
+
+        except Exception as e:
+            print(f"[router] error: {e}", flush=True)
+            await say(f":x: Error: {e}")
+
+
+def _parse(event: dict) -> tuple[str, str, str]:
+    """Return (channel, thread_ts, message) with the @mention tag stripped."""
+    thread_ts = event.get("thread_ts", event["ts"])
+    message = re.sub(r"<@[A-Z0-9]+>", "", event.get("text", "")).strip()
+    return event["channel"], thread_ts, message